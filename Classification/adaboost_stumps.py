@@ -0,0 +1,180 @@
+import numpy as np
+from tree_arrays import classify_batch
+from tree_nodes import create_leaf, create_split
+from tree_split_search import TIE_TOLERANCE
+#Vectorized AdaBoost with decision stumps (Week 5)
+#adaboost_with_tree_stumps calls weighted_decision_tree_create(max_depth=1)
+#every round, which filters the SFrame per feature and adds up the weights
+#with python's sum, then scores the stump with data.apply(classify). Here the
+#stump of a round comes from one matrix product over the 0/1 features
+#    X^T [alpha * y, alpha]
+#whose rows are, for every feature, the signed and the total weight where
+#the feature is 1. The feature == 0 side is the total minus that, and the
+#weighted mistakes of both leaf labels on both sides follow from
+#    weight of +1 = (total + signed) / 2, weight of -1 = (total - signed) / 2
+#The data weights live in log space and are normalized every round, so
+#hundreds of rounds never underflow, and the update is a single vectorized
+#exp. Stumps follow weighted_decision_tree_create with max_depth=1: ties
+#between features go to the first one, ties between labels to +1, and a
+#split that puts every row on one side gives a single leaf.
+#
+#Module 8-2 plots the error of every prefix of the ensemble by calling
+#predict_adaboost(stump_weights[:n], tree_stumps[:n], data) for n = 1..30,
+#which scores the first stump 30 times. staged_predict_adaboost keeps the
+#running score of every row instead and yields the predictions (and the
+#error) after each stump, so the whole curve costs one full prediction.
+
+#weighted errors are kept inside [_MIN_ERROR, 1 - _MIN_ERROR] so a perfect
+#stump gets a large but finite weight instead of log(1 / 0)
+_MIN_ERROR = 1e-16
+
+
+#Returns (log_weights, weights) with the weights scaled to add up to 1
+def normalize_log_weights(log_weights):
+    shift = log_weights.max()
+    weights = np.exp(log_weights - shift)
+    total = weights.sum()
+    return log_weights - (shift + np.log(total)), weights / total
+
+
+#Best weighted stump, as a dict with
+#  feature                   column of the split, None for a single leaf
+#  left_label, right_label   predictions for feature == 0 / feature == 1
+#  error                     weighted error / total weight
+#column_counts (rows where each feature is 1) can be passed to skip a pass
+def best_weighted_stump(feature_matrix, labels, weights, column_counts=None):
+    labels = np.asarray(labels, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    if column_counts is None:
+        column_counts = np.count_nonzero(feature_matrix, axis=0)
+    num_rows = feature_matrix.shape[0]
+    columns = np.empty((num_rows, 2))
+    columns[:, 0] = weights * labels
+    columns[:, 1] = weights
+    right_signed, right_total = np.dot(feature_matrix.T, columns).T
+    total_signed, total = columns.sum(axis=0)
+    total_positive = (total + total_signed) / 2.
+    total_negative = (total - total_signed) / 2.
+    root = create_leaf(total_positive, total_negative, tie_label=+1)
+    stump = {'feature': None,
+             'left_label': root['prediction'],
+             'right_label': root['prediction'],
+             'error': min(total_positive, total_negative) / total}
+    if stump['error'] * total <= 1e-15 or feature_matrix.shape[1] == 0:
+        return stump
+
+    right_positive = (right_total + right_signed) / 2.
+    right_negative = (right_total - right_signed) / 2.
+    left_positive = total_positive - right_positive
+    left_negative = total_negative - right_negative
+    errors = (np.minimum(left_positive, left_negative)
+              + np.minimum(right_positive, right_negative)) / total
+    feature = int(np.flatnonzero(errors <= errors.min() + TIE_TOLERANCE)[0])
+    if column_counts[feature] == 0 or column_counts[feature] == num_rows:
+        return stump
+    stump.update({
+        'feature': feature,
+        'left_label': create_leaf(left_positive[feature], left_negative[feature],
+                                  tie_label=+1)['prediction'],
+        'right_label': create_leaf(right_positive[feature], right_negative[feature],
+                                   tie_label=+1)['prediction'],
+        'error': errors[feature]})
+    return stump
+
+
+def stump_predictions(stump, feature_matrix):
+    if stump['feature'] is None:
+        return np.full(feature_matrix.shape[0], stump['left_label'], dtype=np.int64)
+    return np.where(feature_matrix[:, stump['feature']] == 0,
+                    stump['left_label'], stump['right_label'])
+
+
+def _label_leaf(label):
+    return create_leaf(0, 0, tie_label=label)
+
+
+#Dict tree of a stump, the same as weighted_decision_tree_create returns
+def stump_tree(stump, features):
+    if stump['feature'] is None:
+        return _label_leaf(stump['left_label'])
+    return create_split(features[stump['feature']], _label_leaf(stump['left_label']),
+                        _label_leaf(stump['right_label']))
+
+
+#Returns (stump_weights, stumps, log_weights): the stumps as dicts of
+#best_weighted_stump and the final normalized log data weights
+def boost_stumps(feature_matrix, labels, num_tree_stumps, log_weights=None):
+    feature_matrix = np.ascontiguousarray(feature_matrix, dtype=np.float64)
+    labels = np.asarray(labels)
+    if log_weights is None:
+        log_weights = np.full(len(labels), -np.log(len(labels)))
+    column_counts = np.count_nonzero(feature_matrix, axis=0)
+    stump_weights = []
+    stumps = []
+    for t in range(num_tree_stumps):
+        log_weights, weights = normalize_log_weights(log_weights)
+        stump = best_weighted_stump(feature_matrix, labels, weights, column_counts)
+        predictions = stump_predictions(stump, feature_matrix)
+        is_wrong = predictions != labels
+        weighted_error = np.clip(weights[is_wrong].sum(), _MIN_ERROR, 1. - _MIN_ERROR)
+        weight = 0.5 * np.log((1. - weighted_error) / weighted_error)
+        stump_weights.append(weight)
+        stumps.append(stump)
+        #alpha * exp(-weight) if correct else alpha * exp(weight)
+        log_weights = log_weights + np.where(is_wrong, weight, -weight)
+    return stump_weights, stumps, normalize_log_weights(log_weights)[0]
+
+
+#Predictions of one stump, given as a dict tree or as a best_weighted_stump dict
+def _votes(stump, feature_matrix, features):
+    if 'is_leaf' in stump:
+        return classify_batch(stump, feature_matrix, features)
+    return stump_predictions(stump, feature_matrix)
+
+
+#Yields (num_stumps, predictions, error) after each stump, the predictions
+#are those of predict_adaboost(stump_weights[:num_stumps], ...). error is
+#None without labels. callback(num_stumps, predictions, error) returning
+#True stops after that stump, e.g. stop_when_no_improvement(5).
+def staged_predict_adaboost(stump_weights, tree_stumps, feature_matrix, features=None,
+                            labels=None, callback=None):
+    feature_matrix = np.asarray(feature_matrix)
+    if labels is not None:
+        labels = np.asarray(labels)
+    scores = np.zeros(feature_matrix.shape[0])
+    for i, tree_stump in enumerate(tree_stumps):
+        scores += stump_weights[i] * _votes(tree_stump, feature_matrix, features)
+        predictions = np.where(scores > 0, 1, -1)
+        error = None if labels is None else float(np.mean(predictions != labels))
+        yield i + 1, predictions, error
+        if callback is not None and callback(i + 1, predictions, error):
+            return
+
+
+#Callback that stops once the error has not improved for patience stumps,
+#needs staged_predict_adaboost to be given labels
+def stop_when_no_improvement(patience):
+    best = {'error': np.inf, 'num_stumps': 0}
+
+    def callback(num_stumps, predictions, error):
+        if error is None:
+            raise ValueError('stop_when_no_improvement needs labels to compute the error')
+        if error < best['error']:
+            best['error'] = error
+            best['num_stumps'] = num_stumps
+        return num_stumps - best['num_stumps'] >= patience
+    return callback
+
+
+#[error with the first 1, 2, ... stumps], the error_all list of module 8-2
+def adaboost_error_curve(stump_weights, tree_stumps, feature_matrix, labels, features=None,
+                         callback=None):
+    return [error for _, _, error in staged_predict_adaboost(
+        stump_weights, tree_stumps, feature_matrix, features, labels, callback)]
+
+
+#Drop in for adaboost_with_tree_stumps(data, features, target, num_tree_stumps)
+#on numpy data, returns (stump_weights, tree_stumps)
+def adaboost_with_tree_stumps(feature_matrix, labels, features, num_tree_stumps):
+    stump_weights, stumps, _ = boost_stumps(feature_matrix, labels, num_tree_stumps)
+    return stump_weights, [stump_tree(stump, features) for stump in stumps]
@@ -0,0 +1,122 @@
+import numpy as np
+#Single pass classification metrics for +1/-1 sentiment labels (Week 1 / 2)
+#get_classification_accuracy in module 2 loops over the rows one at a time,
+#module 4 and evaluate_classification_error recompute predictions on their
+#own, and the ROC curve comes from graphlab's evaluate(metric='roc_curve').
+#ClassificationEvaluator takes scores and labels chunk by chunk and keeps
+#only a confusion matrix and two score histograms, so memory stays constant
+#however many rows are scored.
+#
+#scores are margins (w.h(x), predicted +1 when > 0) or probabilities of the
+#positive class (predicted +1 when > 0.5). The ROC curve and AUC come from
+#score histograms over fixed bin edges, so they do not depend on the order
+#or the size of the chunks. They are exact up to ties inside a bin.
+#  probabilities  num_bins equal bins over [0, 1]
+#  margins        0 and +-logspace(MIN_MARGIN, MAX_MARGIN), the same
+#                 relative width at every scale (the word_count models of
+#                 module 2 give margins in the hundreds, regularized ones
+#                 below 1); smaller margins share the bins next to 0 and
+#                 larger ones the two outer bins
+#Pass bin_edges to use other edges.
+
+MIN_MARGIN = 1e-8
+MAX_MARGIN = 1e8
+
+
+#Edges of num_bins + 1 bins (plus the underflow and overflow bins)
+def default_bin_edges(score_type, num_bins):
+    if score_type == 'probability':
+        return np.linspace(0., 1., num_bins + 1)
+    magnitudes = np.logspace(np.log10(MIN_MARGIN), np.log10(MAX_MARGIN), num_bins // 2)
+    return np.concatenate([-magnitudes[::-1], [0.], magnitudes])
+
+
+class ClassificationEvaluator(object):
+
+    def __init__(self, score_type='margin', num_bins=65536, bin_edges=None):
+        if score_type not in ('margin', 'probability'):
+            raise ValueError("score_type must be 'margin' or 'probability', got %r" % score_type)
+        if num_bins < 2:
+            raise ValueError('num_bins must be at least 2')
+        self.score_type = score_type
+        self.num_bins = num_bins
+        #rows are true -1 / +1, columns predicted -1 / +1
+        self.confusion = np.zeros((2, 2), dtype=np.int64)
+        if bin_edges is None:
+            bin_edges = default_bin_edges(score_type, num_bins)
+        self.set_bin_edges(bin_edges)
+
+    #bin 0 holds scores below edges[0], bin i scores in [edges[i-1], edges[i])
+    #and the last bin scores >= edges[-1]
+    def set_bin_edges(self, bin_edges):
+        self.bin_edges = np.unique(np.asarray(bin_edges, dtype=np.float64))
+        self.positive_histogram = np.zeros(len(self.bin_edges) + 1, dtype=np.int64)
+        self.negative_histogram = np.zeros(len(self.bin_edges) + 1, dtype=np.int64)
+
+    def update(self, scores, labels):
+        scores = np.asarray(scores, dtype=np.float64)
+        positive = (np.asarray(labels) == +1)
+        if self.score_type == 'margin':
+            predicted_positive = scores > 0
+        else:
+            predicted_positive = scores > 0.5
+        true_positives = np.count_nonzero(positive & predicted_positive)
+        num_positive = np.count_nonzero(positive)
+        num_predicted_positive = np.count_nonzero(predicted_positive)
+        self.confusion[1, 1] += true_positives
+        self.confusion[1, 0] += num_positive - true_positives
+        self.confusion[0, 1] += num_predicted_positive - true_positives
+        self.confusion[0, 0] += len(scores) - num_positive - num_predicted_positive + true_positives
+        bins = np.searchsorted(self.bin_edges, scores, side='right')
+        size = len(self.positive_histogram)
+        self.positive_histogram += np.bincount(bins[positive], minlength=size)
+        self.negative_histogram += np.bincount(bins[~positive], minlength=size)
+        return self
+
+    #fpr, tpr and the score threshold of every point (scores >= threshold
+    #are predicted positive), from +inf (nothing predicted positive) down
+    #to -inf (everything predicted positive)
+    def roc_curve(self):
+        true_positives = np.concatenate([[0], np.cumsum(self.positive_histogram[::-1])])
+        false_positives = np.concatenate([[0], np.cumsum(self.negative_histogram[::-1])])
+        num_positive = max(true_positives[-1], 1)
+        num_negative = max(false_positives[-1], 1)
+        lower_edges = np.concatenate([[-np.inf], self.bin_edges])
+        thresholds = np.concatenate([[np.inf], lower_edges[::-1]])
+        return (false_positives / float(num_negative),
+                true_positives / float(num_positive),
+                thresholds)
+
+    def auc(self):
+        fpr, tpr, _ = self.roc_curve()
+        return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2.))
+
+    def result(self):
+        (tn, fp), (fn, tp) = self.confusion
+        total = tn + fp + fn + tp
+        fpr, tpr, thresholds = self.roc_curve()
+        return {'accuracy': (tp + tn) / float(total) if total else 0.,
+                'confusion_matrix': self.confusion.copy(),
+                'precision': tp / float(tp + fp) if tp + fp else 0.,
+                'recall': tp / float(tp + fn) if tp + fn else 0.,
+                'roc_curve': {'fpr': fpr, 'tpr': tpr, 'thresholds': thresholds},
+                'auc': self.auc()}
+
+
+#Evaluate scores that are already in memory, chunk_size rows at a time
+def evaluate_scores(scores, labels, score_type='margin', num_bins=65536, chunk_size=1000000):
+    evaluator = ClassificationEvaluator(score_type, num_bins)
+    for start in range(0, len(scores), chunk_size):
+        evaluator.update(scores[start:start + chunk_size], labels[start:start + chunk_size])
+    return evaluator.result()
+
+
+#Score a feature matrix with linear coefficients and evaluate in one pass,
+#replaces get_classification_accuracy(feature_matrix, sentiment, coefficients)
+def evaluate_coefficients(feature_matrix, sentiment, coefficients, num_bins=65536,
+                          chunk_size=65536):
+    evaluator = ClassificationEvaluator('margin', num_bins)
+    for start in range(0, feature_matrix.shape[0], chunk_size):
+        scores = feature_matrix[start:start + chunk_size].dot(coefficients)
+        evaluator.update(scores, sentiment[start:start + chunk_size])
+    return evaluator.result()
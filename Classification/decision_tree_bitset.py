@@ -0,0 +1,110 @@
+import numpy as np
+from tree_nodes import create_leaf, create_split, evaluate_splits, node_mistakes
+#Bit-packed backend for the binary decision tree (Week 3 and 4)
+#best_splitting_feature filters the whole SFrame twice per feature with
+#data[data[feature] == 0] and data[data[feature] == 1]. The one-hot loan
+#features and the labels are all 0/1, so here each feature column, the
+#positive labels and the rows of the current node are stored as packed
+#bitsets (np.packbits, padded to whole 64 bit words). Counting the rows of a
+#node where a feature is 1 is an AND followed by a popcount, done for all
+#candidate features at once, and a node is just a bitset of n/8 bytes.
+
+_WORD = np.dtype('<u8')
+
+#bits set in every byte value, used when numpy has no bitwise_count
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+
+
+#Number of set bits along the last axis of a uint64 array
+def popcount(words):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    as_bytes = words.view(np.uint8)
+    return _POPCOUNT_TABLE[as_bytes].sum(axis=-1)
+
+
+#Pack booleans along the last axis into little endian 64 bit words
+def pack_bits(bits):
+    packed = np.packbits(np.asarray(bits, dtype=bool), axis=-1)
+    padding = (-packed.shape[-1]) % _WORD.itemsize
+    if padding:
+        pad_width = [(0, 0)] * (packed.ndim - 1) + [(0, padding)]
+        packed = np.pad(packed, pad_width, mode='constant')
+    return np.ascontiguousarray(packed).view(_WORD)
+
+
+class BitsetTreeData(object):
+
+    #feature_matrix is n x d with 0/1 entries, e.g. train_data[features].to_numpy()
+    #labels are +1 / -1, e.g. train_data['safe_loans'].to_numpy()
+    def __init__(self, feature_matrix, labels):
+        feature_matrix = np.asarray(feature_matrix)
+        labels = np.asarray(labels)
+        if feature_matrix.ndim != 2 or feature_matrix.shape[0] != len(labels):
+            raise ValueError('feature_matrix must be n x d with one row per label')
+        if np.any((feature_matrix != 0) & (feature_matrix != 1)):
+            raise ValueError('the bitset backend only supports 0/1 features')
+        self.num_rows, self.num_features = feature_matrix.shape
+        self.features = pack_bits(feature_matrix.T)
+        self.positive = pack_bits(labels == +1)
+        self.all_rows = pack_bits(np.ones(self.num_rows, dtype=bool))
+
+    #(num_points, num_positive) of a node
+    def node_counts(self, node):
+        return int(popcount(node)), int(popcount(node & self.positive))
+
+    #Rows of the node where each candidate feature is 1, total and positive
+    def split_counts(self, node, candidates):
+        right = self.features[candidates] & node
+        return popcount(right), popcount(right & self.positive)
+
+    #Bitsets of the two children when splitting on feature
+    def partition(self, node, feature):
+        column = self.features[feature]
+        return node & ~column, node & column
+
+
+#Same stopping rules as decision_tree_create in module 6:
+#  no mistakes, no remaining features, max_depth reached,
+#  no more than min_node_size points, error reduction <= min_error_reduction
+#min_node_size=0 and min_error_reduction=-1 turn the early stopping off
+#stop_on_perfect_split=True adds the rule of module 5: a node whose best
+#split puts every row on one side is a leaf
+def decision_tree_create_bitset(feature_matrix, labels, features, max_depth=10,
+                                min_node_size=1, min_error_reduction=0.0,
+                                stop_on_perfect_split=False):
+    data = feature_matrix if isinstance(feature_matrix, BitsetTreeData) \
+        else BitsetTreeData(feature_matrix, labels)
+    if len(features) != data.num_features:
+        raise ValueError('%d feature names for %d columns' % (len(features), data.num_features))
+    return _build(data, list(features), data.all_rows, np.arange(data.num_features),
+                  0, max_depth, min_node_size, min_error_reduction, stop_on_perfect_split)
+
+
+def _build(data, features, node, remaining, current_depth, max_depth,
+           min_node_size, min_error_reduction, stop_on_perfect_split=False):
+    num_points, num_positive = data.node_counts(node)
+    num_negative = num_points - num_positive
+    mistakes = node_mistakes(num_positive, num_negative)
+    if mistakes == 0 or len(remaining) == 0 or current_depth >= max_depth \
+            or num_points <= min_node_size:
+        return create_leaf(num_positive, num_negative)
+
+    right_points, right_positive = data.split_counts(node, remaining)
+    errors, _, _ = evaluate_splits(right_positive, right_points - right_positive,
+                                   num_positive, num_negative)
+    best = int(np.argmin(errors))
+    if stop_on_perfect_split and right_points[best] in (0, num_points):
+        return create_leaf(num_positive, num_negative)
+    error_before_split = mistakes / float(num_points)
+    if error_before_split - errors[best] <= min_error_reduction:
+        return create_leaf(num_positive, num_negative)
+
+    splitting_feature = remaining[best]
+    left_node, right_node = data.partition(node, splitting_feature)
+    remaining = np.delete(remaining, best)
+    left_tree = _build(data, features, left_node, remaining, current_depth + 1,
+                       max_depth, min_node_size, min_error_reduction, stop_on_perfect_split)
+    right_tree = _build(data, features, right_node, remaining, current_depth + 1,
+                        max_depth, min_node_size, min_error_reduction, stop_on_perfect_split)
+    return create_split(features[splitting_feature], left_tree, right_tree)
@@ -0,0 +1,286 @@
+import multiprocessing
+import time
+import numpy as np
+from shared_arrays import attach_array, share_array
+from tree_nodes import create_leaf, create_split
+from tree_split_search import best_split
+#Index based decision tree construction (Week 3, 4 and 5)
+#decision_tree_create and weighted_decision_tree_create materialize
+#left_split / right_split SFrames at every node, and the weighted version
+#also filters data_weights twice. Here the feature matrix, labels and
+#weights are contiguous arrays owned by the root, and the rows of the whole
+#tree live in a single index array: every node is a [start, stop) slice of
+#it, and splitting a node partitions its slice in place (feature == 0 rows
+#first). Memory stays O(n) for the whole build instead of O(n * depth).
+#
+#With num_workers > 1 the top of the tree is split in this process until
+#there are a few pending subtrees per worker, then every pending subtree with
+#at least min_parallel_rows rows is built in a process pool. The feature
+#matrix, labels and weights are copied into shared memory once and only the
+#row indices of a subtree are sent to a worker. A subtree sees its rows in
+#the same order either way, so the tree is identical to the sequential one.
+#
+#Passing a tree_trace.BuildTrace as trace records how the build went at every
+#node (size, split search time, chosen feature, errors, why it stopped).
+#Without one the builder only pays an "is None" test per node.
+
+#set by _init_worker in every worker process
+_shared = {}
+
+_clock = getattr(time, 'perf_counter', time.time)
+
+
+class TreeBuilder(object):
+
+    #dtype the feature matrix is stored in
+    feature_dtype = np.float64
+
+    #weighted=True follows weighted_decision_tree_create in module 8, otherwise
+    #decision_tree_create in module 6 (see decision_tree_create below)
+    #stop_on_perfect_split=True adds module 5's rule to the unweighted build:
+    #a node whose best split puts every row on one side becomes a leaf
+    #record_stats=True adds a 'stats' dict to every node (see node_stats)
+    def __init__(self, feature_matrix, labels, features, weights=None, weighted=False,
+                 max_depth=10, min_node_size=1, min_error_reduction=0.0, record_stats=False,
+                 trace=None, stop_on_perfect_split=False):
+        self.feature_matrix = np.ascontiguousarray(feature_matrix, dtype=self.feature_dtype)
+        self.labels = np.ascontiguousarray(labels)
+        self.features = list(features)
+        if self.feature_matrix.ndim != 2 or self.feature_matrix.shape[0] != len(self.labels):
+            raise ValueError('feature_matrix must be n x d with one row per label')
+        if len(self.features) != self.feature_matrix.shape[1]:
+            raise ValueError('%d feature names for %d columns'
+                             % (len(self.features), self.feature_matrix.shape[1]))
+        self.weights = None if weights is None else np.ascontiguousarray(weights, dtype=np.float64)
+        self.weighted = weighted
+        self.max_depth = max_depth
+        self.min_node_size = min_node_size
+        self.min_error_reduction = min_error_reduction
+        self.stop_on_perfect_split = stop_on_perfect_split
+        self.record_stats = record_stats
+        self.trace = trace
+        self.rows = np.arange(self.feature_matrix.shape[0])
+
+    def build(self, num_workers=1, min_parallel_rows=10000):
+        remaining = np.arange(len(self.features))
+        first_depth = 1 if self.weighted else 0
+        if num_workers is None:
+            num_workers = multiprocessing.cpu_count()
+        if num_workers <= 1 or len(self.rows) < min_parallel_rows:
+            return self.build_node(0, len(self.rows), remaining, first_depth)
+        return self.build_parallel(remaining, first_depth, num_workers, min_parallel_rows)
+
+    #Build the subtree over the given rows (in this order) from scratch,
+    #used by the workers of build_parallel
+    def build_rows(self, rows, remaining, current_depth, node_id=1):
+        self.rows = np.array(rows)
+        return self.build_node(0, len(self.rows), remaining, current_depth, node_id)
+
+    #Keyword arguments that recreate this builder around the same arrays,
+    #used to set up the workers of build_parallel
+    def options(self):
+        return {'features': self.features,
+                'weighted': self.weighted,
+                'max_depth': self.max_depth,
+                'min_node_size': self.min_node_size,
+                'min_error_reduction': self.min_error_reduction,
+                'stop_on_perfect_split': self.stop_on_perfect_split,
+                'record_stats': self.record_stats,
+                'trace': None if self.trace is None else type(self.trace)()}
+
+    def find_split(self, start, stop, remaining):
+        return best_split(self.feature_matrix, self.labels, self.rows[start:stop],
+                          remaining, self.weights)
+
+    def goes_right(self, segment, split):
+        return self.feature_matrix[segment, split['feature']] != 0
+
+    #Features the children can still split on
+    def child_features(self, remaining, split):
+        return np.delete(remaining, split['position'])
+
+    def split_tree_node(self, split):
+        return create_split(self.features[split['feature']], None, None)
+
+    #Sort the node's slice of rows into [left rows | right rows] and return
+    #the boundary
+    def partition(self, start, stop, split):
+        segment = self.rows[start:stop]
+        goes_right = self.goes_right(segment, split)
+        num_left = len(segment) - np.count_nonzero(goes_right)
+        self.rows[start:stop] = np.concatenate([segment[~goes_right], segment[goes_right]])
+        return start + num_left
+
+    def leaf(self, split):
+        return create_leaf(split['num_positive'], split['num_negative'],
+                           tie_label=+1 if self.weighted else -1)
+
+    #What the node looked like to the builder, whatever it decided:
+    #  depth, num_points, num_positive, num_negative, node_mistakes,
+    #  error_before_split, error_reduction (None if no split was possible),
+    #  prediction (the leaf this node would be if it stopped here)
+    def node_stats(self, split, current_depth):
+        if split['feature'] is None:
+            error_reduction = None
+        else:
+            error_reduction = float(split['error_before_split'] - split['error_after_split'])
+        return {'depth': current_depth,
+                'num_points': split['num_points'],
+                'num_positive': float(split['num_positive']),
+                'num_negative': float(split['num_negative']),
+                'node_mistakes': float(split['node_mistakes']),
+                'error_before_split': float(split['error_before_split']),
+                'error_reduction': error_reduction,
+                'prediction': self.leaf(split)['prediction']}
+
+    #Returns (leaf, None) when the node stops, otherwise (split node without
+    #children, (middle, remaining features of the children))
+    #node_id numbers the nodes like a heap: the root is 1 and the children of
+    #node i are 2 * i (left) and 2 * i + 1 (right)
+    def split_node(self, start, stop, remaining, current_depth, node_id=1):
+        if self.trace is not None:
+            started = _clock()
+        split = self.find_split(start, stop, remaining)
+        if self.trace is not None:
+            searched = _clock()
+        reason = self.stop_reason(split, remaining, current_depth)
+        if reason is not None:
+            node, children = self.leaf(split), None
+        else:
+            middle = self.partition(start, stop, split)
+            node, children = self.split_tree_node(split), (middle, self.child_features(remaining, split))
+        if self.record_stats:
+            node['stats'] = self.node_stats(split, current_depth)
+        if self.trace is not None:
+            feature = None if split['feature'] is None else self.features[split['feature']]
+            self.trace.record(node_id, current_depth, stop - start, searched - started,
+                              _clock() - searched, split, feature, reason)
+        return node, children
+
+    def build_node(self, start, stop, remaining, current_depth, node_id=1):
+        node, children = self.split_node(start, stop, remaining, current_depth, node_id)
+        if children is None:
+            return node
+        middle, remaining = children
+        node['left'] = self.build_node(start, middle, remaining, current_depth + 1, 2 * node_id)
+        node['right'] = self.build_node(middle, stop, remaining, current_depth + 1, 2 * node_id + 1)
+        return node
+
+    def build_parallel(self, remaining, first_depth, num_workers, min_parallel_rows):
+        root = {}
+        #pending subtrees: (start, stop, remaining, depth, node_id, parent, key in parent)
+        pending = [(0, len(self.rows), remaining, first_depth, 1, root, 'tree')]
+        while pending and len(pending) < 4 * num_workers:
+            largest = max(range(len(pending)), key=lambda i: pending[i][1] - pending[i][0])
+            start, stop, remaining, current_depth, node_id, parent, key = pending[largest]
+            if stop - start < min_parallel_rows:
+                break
+            del pending[largest]
+            node, children = self.split_node(start, stop, remaining, current_depth, node_id)
+            parent[key] = node
+            if children is not None:
+                middle, remaining = children
+                pending.append((start, middle, remaining, current_depth + 1,
+                                2 * node_id, node, 'left'))
+                pending.append((middle, stop, remaining, current_depth + 1,
+                                2 * node_id + 1, node, 'right'))
+        #nothing big enough for a worker: finish the small subtrees here
+        #without starting a pool or copying the data into shared memory
+        if all(item[1] - item[0] < min_parallel_rows for item in pending):
+            for start, stop, remaining, current_depth, node_id, parent, key in pending:
+                parent[key] = self.build_node(start, stop, remaining, current_depth, node_id)
+            return root['tree']
+
+        shared_weights = None if self.weights is None else share_array(self.weights)
+        pool = multiprocessing.Pool(num_workers, _init_worker,
+                                    (type(self), share_array(self.feature_matrix),
+                                     share_array(self.labels), shared_weights, self.options()))
+        try:
+            results = []
+            for start, stop, remaining, current_depth, node_id, parent, key in pending:
+                if stop - start >= min_parallel_rows:
+                    task = (self.rows[start:stop], remaining, current_depth, node_id)
+                    results.append((parent, key, pool.apply_async(_build_subtree, task)))
+            #the small subtrees are built here while the workers run
+            for start, stop, remaining, current_depth, node_id, parent, key in pending:
+                if stop - start < min_parallel_rows:
+                    parent[key] = self.build_node(start, stop, remaining, current_depth, node_id)
+            for parent, key, result in results:
+                parent[key], records = result.get()
+                if records is not None:
+                    self.trace.extend(records)
+        finally:
+            pool.close()
+            pool.join()
+        return root['tree']
+
+    #Why the node stops, in the order the notebooks check, None if it splits
+    def stop_reason(self, split, remaining, current_depth):
+        if self.weighted:
+            if split['node_mistakes'] <= 1e-15:
+                return 'no mistakes'
+            if len(remaining) == 0:
+                return 'no remaining features'
+            if current_depth > self.max_depth:
+                return 'max depth'
+            if split['feature'] is None:
+                return 'no split'
+            #all the data points on one side ("perfect" split in module 8)
+            if split['left_points'] == 0 or split['right_points'] == 0:
+                return 'perfect split'
+            return None
+        if split['node_mistakes'] == 0:
+            return 'no mistakes'
+        if len(remaining) == 0:
+            return 'no remaining features'
+        if current_depth >= self.max_depth:
+            return 'max depth'
+        if split['num_points'] <= self.min_node_size:
+            return 'min node size'
+        if split['feature'] is None:
+            return 'no split'
+        if self.stop_on_perfect_split and (split['left_points'] == 0
+                                           or split['right_points'] == 0):
+            return 'perfect split'
+        if split['error_before_split'] - split['error_after_split'] <= self.min_error_reduction:
+            return 'min error reduction'
+        return None
+
+
+def _init_worker(builder_class, shared_matrix, shared_labels, shared_weights, options):
+    weights = None if shared_weights is None else attach_array(shared_weights)
+    _shared['builder'] = builder_class(attach_array(shared_matrix), attach_array(shared_labels),
+                                       weights=weights, **options)
+
+
+#Returns (subtree, trace records of the subtree or None)
+def _build_subtree(rows, remaining, current_depth, node_id):
+    builder = _shared['builder']
+    tree = builder.build_rows(rows, remaining, current_depth, node_id)
+    if builder.trace is None:
+        return tree, None
+    return tree, builder.trace.pop_records()
+
+
+#Same trees as decision_tree_create(data, features, target, 0, max_depth,
+#min_node_size, min_error_reduction) in module 6 on numpy data:
+#feature_matrix = data[features].to_numpy(), labels = data[target].to_numpy()
+#num_workers=None uses every core
+#decision_tree_create(data, features, target, 0, max_depth) of module 5 is
+#min_node_size=0, min_error_reduction=-1, stop_on_perfect_split=True
+def decision_tree_create(feature_matrix, labels, features, max_depth=10,
+                         min_node_size=1, min_error_reduction=0.0,
+                         num_workers=1, min_parallel_rows=10000, stop_on_perfect_split=False):
+    return TreeBuilder(feature_matrix, labels, features, max_depth=max_depth,
+                       min_node_size=min_node_size,
+                       min_error_reduction=min_error_reduction,
+                       stop_on_perfect_split=stop_on_perfect_split
+                       ).build(num_workers, min_parallel_rows)
+
+
+#Same trees as weighted_decision_tree_create in module 8
+def weighted_decision_tree_create(feature_matrix, labels, features, data_weights, max_depth=10,
+                                  num_workers=1, min_parallel_rows=10000):
+    return TreeBuilder(feature_matrix, labels, features, weights=data_weights,
+                       weighted=True, max_depth=max_depth
+                       ).build(num_workers, min_parallel_rows)
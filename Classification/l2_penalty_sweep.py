@@ -0,0 +1,104 @@
+import multiprocessing
+import numpy as np
+import scipy.sparse
+from shared_arrays import attach_array, share_array
+#Fit logistic_regression_with_L2 for several penalties in parallel (Week 2)
+#Module 4 trains six models (L2 = 0, 4, 10, 1e2, 1e3, 1e5) one after
+#another on the same feature_matrix_train. l2_penalty_sweep copies the
+#feature matrix and labels into shared memory once, every worker process
+#maps the same buffers, and each penalty is fitted in its own worker.
+#Only the penalties and the learned coefficients cross process boundaries.
+
+#set by _init_worker in every worker process
+_shared = {}
+
+
+def _share_matrix(feature_matrix):
+    if scipy.sparse.issparse(feature_matrix):
+        feature_matrix = feature_matrix.tocsr()
+        return ('csr', feature_matrix.shape,
+                share_array(feature_matrix.data),
+                share_array(feature_matrix.indices),
+                share_array(feature_matrix.indptr))
+    return ('dense', share_array(feature_matrix))
+
+
+def _attach_matrix(shared):
+    if shared[0] == 'csr':
+        shape = shared[1]
+        data, indices, indptr = [attach_array(part) for part in shared[2:]]
+        return scipy.sparse.csr_matrix((data, indices, indptr), shape=shape, copy=False)
+    return attach_array(shared[1])
+
+
+def _init_worker(shared_matrix, shared_sentiment, options):
+    _shared['feature_matrix'] = _attach_matrix(shared_matrix)
+    _shared['sentiment'] = attach_array(shared_sentiment)
+    _shared['options'] = options
+
+
+#Fits one penalty on the shared data in a worker process
+def _fit_penalty(l2_penalty):
+    return _fit(_shared['feature_matrix'], _shared['sentiment'], _shared['options'], l2_penalty)
+
+
+def _fit(feature_matrix, sentiment, options, l2_penalty):
+    if options['solver'] == 'gradient':
+        from logistic_kernels import logistic_regression
+        coefficients, _ = logistic_regression(feature_matrix, sentiment,
+                                              options['initial_coefficients'],
+                                              options['step_size'], options['max_iter'],
+                                              l2_penalty=l2_penalty, verbose=False)
+    else:
+        from logistic_newton import logistic_regression_newton
+        coefficients, _ = logistic_regression_newton(feature_matrix, sentiment,
+                                                     options['initial_coefficients'],
+                                                     l2_penalty, solver=options['solver'])
+    return l2_penalty, coefficients
+
+
+#Returns {l2_penalty: coefficients}
+#solver='gradient' reproduces logistic_regression_with_L2 with the given
+#step_size and max_iter, 'irls', 'newton-cg' or 'lbfgs' use logistic_newton
+def l2_penalty_sweep(feature_matrix, sentiment, l2_penalty_list, initial_coefficients,
+                     step_size=5e-6, max_iter=501, solver='gradient', num_workers=None):
+    options = {'initial_coefficients': np.asarray(initial_coefficients, dtype=np.float64),
+               'step_size': step_size,
+               'max_iter': max_iter,
+               'solver': solver}
+    if num_workers is None:
+        num_workers = min(len(l2_penalty_list), multiprocessing.cpu_count())
+    if num_workers <= 1:
+        #no workers, so no shared memory copy: fit on the caller's arrays
+        if scipy.sparse.issparse(feature_matrix):
+            feature_matrix = feature_matrix.tocsr()
+        sentiment = np.asarray(sentiment)
+        return dict(_fit(feature_matrix, sentiment, options, p) for p in l2_penalty_list)
+    shared_matrix = _share_matrix(feature_matrix)
+    shared_sentiment = share_array(np.asarray(sentiment))
+    pool = multiprocessing.Pool(num_workers, _init_worker,
+                                (shared_matrix, shared_sentiment, options))
+    try:
+        return dict(pool.map(_fit_penalty, l2_penalty_list, chunksize=1))
+    finally:
+        pool.close()
+        pool.join()
+
+
+#'coefficients [L2=1e2]' style column names used in the notebook
+def penalty_column_name(l2_penalty):
+    if l2_penalty >= 100:
+        power = np.log10(l2_penalty)
+        if power == int(power):
+            return 'coefficients [L2=1e%d]' % power
+    return 'coefficients [L2=%g]' % l2_penalty
+
+
+#Columns of the add_coefficients_to_table table, one per penalty
+#graphlab.SFrame(coefficient_table(results, important_words)) gives the
+#table the notebook builds column by column
+def coefficient_table(results, words):
+    table = {'word': ['(intercept)'] + list(words)}
+    for l2_penalty in sorted(results):
+        table[penalty_column_name(l2_penalty)] = results[l2_penalty]
+    return table
@@ -0,0 +1,78 @@
+import numpy as np
+#Fused logistic regression pass (Week 2)
+#logistic_regression computes np.dot(feature_matrix, coefficients) in
+#predict_probability and again in compute_log_likelihood every time it logs,
+#and compute_log_likelihood_with_L2 overflows in np.exp(-scores).
+#logistic_pass computes the scores once and returns the probabilities, the
+#log likelihood and the gradient together, working through the rows in
+#chunks so the temporaries stay small. feature_matrix can be a numpy array,
+#a memmap or a scipy.sparse CSR matrix (see text_features.count_vectorize).
+
+
+#P(y_i = +1 | x_i, w) without overflow for large negative scores
+def sigmoid(scores):
+    return np.exp(-np.logaddexp(0., -scores))
+
+
+#One pass over the data for the objective of logistic_regression_with_L2
+#Returns (probabilities, log_likelihood, gradient)
+#log_likelihood uses log(1 + exp(-score)) = logaddexp(0, -score), which is
+#finite for every score, and like the notebooks the intercept (column 0) is
+#not penalized
+def logistic_pass(feature_matrix, sentiment, coefficients, l2_penalty=0.,
+                  chunk_size=65536, probabilities=None):
+    coefficients = np.asarray(coefficients, dtype=np.float64)
+    num_rows = feature_matrix.shape[0]
+    if probabilities is None:
+        probabilities = np.empty(num_rows)
+    log_likelihood = 0.
+    gradient = np.zeros(len(coefficients))
+    for start in range(0, num_rows, chunk_size):
+        stop = min(start + chunk_size, num_rows)
+        chunk = feature_matrix[start:stop]
+        indicator = (np.asarray(sentiment[start:stop]) == +1)
+        scores = chunk.dot(coefficients)
+        chunk_probabilities = sigmoid(scores)
+        probabilities[start:stop] = chunk_probabilities
+        log_likelihood += np.sum((indicator - 1.) * scores - np.logaddexp(0., -scores))
+        gradient += chunk.T.dot(indicator - chunk_probabilities)
+    if l2_penalty:
+        log_likelihood -= l2_penalty * np.sum(coefficients[1:] ** 2)
+        gradient[1:] -= 2 * l2_penalty * coefficients[1:]
+    return probabilities, log_likelihood, gradient
+
+
+#Same logging schedule as logistic_regression in the notebooks
+def should_log(itr):
+    return (itr <= 15 or (itr <= 100 and itr % 10 == 0) or (itr <= 1000 and itr % 100 == 0)
+            or (itr <= 10000 and itr % 1000 == 0) or itr % 10000 == 0)
+
+
+#Drop in replacement for logistic_regression / logistic_regression_with_L2
+#Each iteration makes a single pass over the data. The log likelihood that
+#the notebooks print after iteration itr is the one the pass of iteration
+#itr + 1 computes anyway, so logging costs nothing extra except one pass at
+#the very end. Returns (coefficients, log_likelihood_history).
+def logistic_regression(feature_matrix, sentiment, initial_coefficients, step_size,
+                        max_iter, l2_penalty=0., chunk_size=65536, verbose=True):
+    coefficients = np.array(initial_coefficients, dtype=np.float64)
+    probabilities = np.empty(feature_matrix.shape[0])
+    history = []
+    width = int(np.ceil(np.log10(max(max_iter, 2))))
+
+    def record(itr, lp):
+        history.append((itr, lp))
+        if verbose:
+            print('iteration %*d: log likelihood of observed labels = %.8f' % (width, itr, lp))
+
+    for itr in range(max_iter):
+        _, lp, gradient = logistic_pass(feature_matrix, sentiment, coefficients,
+                                        l2_penalty, chunk_size, probabilities)
+        if itr > 0 and should_log(itr - 1):
+            record(itr - 1, lp)
+        coefficients += step_size * gradient
+    if max_iter > 0 and should_log(max_iter - 1):
+        _, lp, _ = logistic_pass(feature_matrix, sentiment, coefficients,
+                                 l2_penalty, chunk_size, probabilities)
+        record(max_iter - 1, lp)
+    return coefficients, history
@@ -0,0 +1,135 @@
+import numpy as np
+import scipy.linalg
+import scipy.optimize
+from logistic_kernels import logistic_pass
+#Second order solvers for logistic regression with an L2 penalty (Week 2)
+#Maximizes the same objective as compute_log_likelihood_with_L2
+#    ll(w) = sum_i (1[y_i = +1] - 1) w.h(x_i) - ln(1 + exp(-w.h(x_i))) - l2_penalty ||w[1:]||^2
+#Gradient ascent with step_size=5e-6 needs hundreds of passes to settle,
+#Newton's method usually gets there in about ten.
+#  solver='irls'       Newton / IRLS, forms the d x d Hessian and solves it
+#                      with a Cholesky factorization, for moderate d such as
+#                      the 194 important_words features
+#  solver='newton-cg'  truncated Newton, only needs Hessian-vector products,
+#                      for large sparse d such as hashed features
+#  solver='lbfgs'      quasi-Newton, only needs gradients
+#All of them return (coefficients, log_likelihood_history) like
+#logistic_kernels.logistic_regression, so the coefficients drop straight into
+#add_coefficients_to_table.
+
+
+#Diagonal of the penalty Hessian, the intercept is not penalized
+def _penalty_diagonal(num_coefficients, l2_penalty):
+    diagonal = np.empty(num_coefficients)
+    diagonal.fill(2. * l2_penalty)
+    diagonal[0] = 0.
+    return diagonal
+
+
+#X^T diag(weights) X, built chunk_size rows at a time
+def weighted_gram(feature_matrix, weights, chunk_size=65536):
+    num_rows, num_columns = feature_matrix.shape
+    gram = np.zeros((num_columns, num_columns))
+    for start in range(0, num_rows, chunk_size):
+        chunk = feature_matrix[start:start + chunk_size]
+        weighted = chunk.T.dot(_scale_rows(chunk, weights[start:start + chunk_size]))
+        gram += weighted.toarray() if hasattr(weighted, 'toarray') else weighted
+    return gram
+
+
+def _scale_rows(chunk, weights):
+    if hasattr(chunk, 'multiply'):
+        return chunk.multiply(weights[:, np.newaxis]).tocsr()
+    return chunk * weights[:, np.newaxis]
+
+
+def logistic_regression_irls(feature_matrix, sentiment, initial_coefficients, l2_penalty=0.,
+                             max_iter=20, tolerance=1e-8, chunk_size=65536, verbose=False):
+    coefficients = np.array(initial_coefficients, dtype=np.float64)
+    penalty = _penalty_diagonal(len(coefficients), l2_penalty)
+    probabilities = np.empty(feature_matrix.shape[0])
+    history = []
+    previous_lp = None
+    for itr in range(max_iter):
+        _, lp, gradient = logistic_pass(feature_matrix, sentiment, coefficients,
+                                        l2_penalty, chunk_size, probabilities)
+        history.append((itr, lp))
+        if verbose:
+            print('iteration %d: log likelihood of observed labels = %.8f' % (itr, lp))
+        if previous_lp is not None and abs(lp - previous_lp) <= tolerance * max(1., abs(lp)):
+            break
+        previous_lp = lp
+        hessian = weighted_gram(feature_matrix, probabilities * (1. - probabilities), chunk_size)
+        hessian[np.diag_indices_from(hessian)] += penalty
+        coefficients += _cholesky_solve(hessian, gradient)
+    return coefficients, history
+
+
+#Solve H x = g for the negated Hessian, which is positive semi-definite
+#Without a penalty it can be singular (e.g. a word that never occurs), in
+#which case a small ridge is added until the factorization succeeds
+def _cholesky_solve(hessian, gradient):
+    jitter = 0.
+    scale = max(np.max(np.diag(hessian)), 1.)
+    while True:
+        try:
+            if jitter:
+                hessian = hessian + jitter * np.eye(len(hessian))
+            factor = scipy.linalg.cho_factor(hessian)
+            return scipy.linalg.cho_solve(factor, gradient)
+        except np.linalg.LinAlgError:
+            jitter = 1e-10 * scale if not jitter else jitter * 10
+
+
+def logistic_regression_newton(feature_matrix, sentiment, initial_coefficients, l2_penalty=0.,
+                               solver='irls', max_iter=None, tolerance=1e-8,
+                               chunk_size=65536, verbose=False):
+    if solver == 'irls':
+        return logistic_regression_irls(feature_matrix, sentiment, initial_coefficients,
+                                        l2_penalty, max_iter or 20, tolerance, chunk_size,
+                                        verbose)
+    if solver not in ('newton-cg', 'lbfgs'):
+        raise ValueError("solver must be 'irls', 'newton-cg' or 'lbfgs', got %r" % solver)
+
+    penalty = _penalty_diagonal(len(initial_coefficients), l2_penalty)
+    probabilities = np.empty(feature_matrix.shape[0])
+    history = []
+    #coefficients and log likelihood of the last pass, so the Hessian
+    #products and the callback reuse it instead of rescoring the data
+    last = {'coefficients': None, 'lp': None}
+
+    #scipy minimizes, so work with -ll and -gradient
+    def objective(coefficients):
+        _, lp, gradient = logistic_pass(feature_matrix, sentiment, coefficients,
+                                        l2_penalty, chunk_size, probabilities)
+        last['coefficients'] = np.array(coefficients)
+        last['lp'] = lp
+        return -lp, -gradient
+
+    def ensure_pass(coefficients):
+        if last['coefficients'] is None or not np.array_equal(coefficients, last['coefficients']):
+            objective(coefficients)
+
+    #(X^T diag(p(1-p)) X + penalty) v without forming the Hessian
+    def hessian_product(coefficients, vector):
+        ensure_pass(coefficients)
+        weights = probabilities * (1. - probabilities)
+        return feature_matrix.T.dot(weights * feature_matrix.dot(vector)) + penalty * vector
+
+    def callback(coefficients):
+        ensure_pass(coefficients)
+        history.append((len(history), last['lp']))
+        if verbose:
+            print('iteration %d: log likelihood of observed labels = %.8f'
+                  % (len(history) - 1, last['lp']))
+
+    if solver == 'newton-cg':
+        result = scipy.optimize.minimize(objective, np.array(initial_coefficients, dtype=np.float64),
+                                         jac=True, hessp=hessian_product, method='Newton-CG',
+                                         callback=callback,
+                                         options={'maxiter': max_iter or 50, 'xtol': tolerance})
+    else:
+        result = scipy.optimize.minimize(objective, np.array(initial_coefficients, dtype=np.float64),
+                                         jac=True, method='L-BFGS-B', callback=callback,
+                                         options={'maxiter': max_iter or 200, 'ftol': tolerance})
+    return result.x, history
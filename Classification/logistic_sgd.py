@@ -0,0 +1,73 @@
+import numpy as np
+from logistic_kernels import logistic_pass
+#Mini-batch stochastic gradient ascent for logistic regression (Week 2)
+#logistic_regression and logistic_regression_with_L2 touch every review on
+#every one of their max_iter iterations. Here each step only looks at
+#batch_size reviews, so a large corpus converges in a few epochs.
+#
+#The data is never copied or reshuffled in place: every epoch draws a new
+#permutation index and each batch gathers its rows through it, which also
+#works on np.load(..., mmap_mode='r') arrays and scipy.sparse matrices.
+#Sources that do not fit in memory at all can be streamed through
+#stochastic_gradient_ascent with a generator of (features, labels) batches.
+
+
+#Yields (feature_batch, sentiment_batch) for one epoch
+#Rows inside a batch are read in increasing order, which keeps reads from a
+#memory-mapped file sequential; the order does not change the gradient
+def iter_minibatches(feature_matrix, sentiment, batch_size, shuffle=True, random_state=None):
+    num_rows = feature_matrix.shape[0]
+    if shuffle:
+        if random_state is None:
+            random_state = np.random.RandomState()
+        order = random_state.permutation(num_rows)
+    else:
+        order = np.arange(num_rows)
+    for start in range(0, num_rows, batch_size):
+        rows = np.sort(order[start:start + batch_size])
+        yield feature_matrix[rows], np.asarray(sentiment[rows])
+
+
+#batch_source(epoch) returns an iterable of (feature_batch, sentiment_batch)
+#Each step moves along the gradient averaged over the batch, with the step
+#size decayed as step_size / (1 + decay * step). num_rows is the size of the
+#whole data set, used to spread the L2 penalty over the batches of an epoch.
+#Returns (coefficients, log_likelihood_all) where log_likelihood_all holds
+#the average log likelihood of every batch, measured on the coefficients
+#the batch was scored with.
+def stochastic_gradient_ascent(batch_source, initial_coefficients, step_size, max_epochs,
+                               l2_penalty=0., decay=0., num_rows=None, verbose=False):
+    if l2_penalty and num_rows is None:
+        raise ValueError('num_rows is required to scale the L2 penalty per batch')
+    coefficients = np.array(initial_coefficients, dtype=np.float64)
+    log_likelihood_all = []
+    step = 0
+    for epoch in range(max_epochs):
+        for feature_batch, sentiment_batch in batch_source(epoch):
+            batch_rows = feature_batch.shape[0]
+            if batch_rows == 0:
+                continue
+            batch_penalty = l2_penalty * batch_rows / float(num_rows) if l2_penalty else 0.
+            _, lp, gradient = logistic_pass(feature_batch, sentiment_batch, coefficients,
+                                            batch_penalty, chunk_size=batch_rows)
+            current_step_size = step_size / (1. + decay * step)
+            coefficients += current_step_size * gradient / batch_rows
+            log_likelihood_all.append(lp / batch_rows)
+            step += 1
+        if verbose and log_likelihood_all:
+            print('epoch %d: average log likelihood of last batch = %.8f'
+                  % (epoch, log_likelihood_all[-1]))
+    return coefficients, log_likelihood_all
+
+
+#In memory (or memory-mapped) version with the same arguments as
+#logistic_regression_with_L2, max_iter replaced by max_epochs
+def logistic_regression_SG(feature_matrix, sentiment, initial_coefficients, step_size,
+                           batch_size, max_epochs, l2_penalty=0., decay=0., seed=1,
+                           verbose=False):
+    random_state = np.random.RandomState(seed)
+    def batch_source(epoch):
+        return iter_minibatches(feature_matrix, sentiment, batch_size, True, random_state)
+    return stochastic_gradient_ascent(batch_source, initial_coefficients, step_size,
+                                      max_epochs, l2_penalty, decay,
+                                      num_rows=feature_matrix.shape[0], verbose=verbose)
@@ -0,0 +1,148 @@
+import json
+import numpy as np
+from logistic_kernels import logistic_pass, sigmoid
+from logistic_sgd import iter_minibatches
+#Incremental sentiment classifier for a stream of new reviews (Week 1 / 2)
+#Retraining logistic_regression on the whole corpus every time reviews
+#arrive costs time proportional to the full history. OnlineLogisticRegression
+#keeps its optimizer state between calls, and partial_fit only takes a
+#bounded number of mini-batch steps over the new reviews.
+#
+#  optimizer='sgd'   averaged gradient steps with step_size / (1 + decay * t)
+#  optimizer='ftrl'  FTRL-proximal with per-coefficient learning rates
+#                    alpha / (beta + sqrt(sum of squared gradients)), which
+#                    suits sparse word counts where most words are rare
+#
+#l2_penalty (and l1_penalty for FTRL) are per review, and like the
+#notebooks the intercept in column 0 is never penalized.
+
+
+#np.savez adds .npz to paths without it
+def _npz_path(path):
+    path = str(path)
+    return path if path.endswith('.npz') else path + '.npz'
+
+
+class OnlineLogisticRegression(object):
+
+    def __init__(self, num_coefficients, optimizer='ftrl', step_size=0.1, decay=0.,
+                 alpha=0.1, beta=1., l1_penalty=0., l2_penalty=0., batch_size=256,
+                 initial_coefficients=None, seed=1):
+        if optimizer not in ('sgd', 'ftrl'):
+            raise ValueError("optimizer must be 'sgd' or 'ftrl', got %r" % optimizer)
+        self.optimizer = optimizer
+        self.step_size = step_size
+        self.decay = decay
+        self.alpha = alpha
+        self.beta = beta
+        self.l1_penalty = l1_penalty
+        self.l2_penalty = l2_penalty
+        self.batch_size = batch_size
+        self.random_state = np.random.RandomState(seed)
+        self.num_steps = 0
+        self.num_seen = 0
+        self.coefficients = np.zeros(num_coefficients)
+        #FTRL state
+        self.z = np.zeros(num_coefficients)
+        self.n = np.zeros(num_coefficients)
+        if initial_coefficients is not None:
+            self.warm_start(initial_coefficients)
+
+    #Start from already trained coefficients, e.g. from logistic_regression
+    def warm_start(self, coefficients):
+        coefficients = np.array(coefficients, dtype=np.float64)
+        if coefficients.shape != self.coefficients.shape:
+            raise ValueError('expected %d coefficients, got %d'
+                             % (len(self.coefficients), len(coefficients)))
+        self.coefficients = coefficients
+        #choose z so the FTRL closed form gives back these coefficients
+        #while no gradients have been seen
+        l1, l2 = self._penalties()
+        self.z = -coefficients * (self.beta / self.alpha + l2) - np.sign(coefficients) * l1
+        self.n = np.zeros(len(coefficients))
+
+    def _penalties(self):
+        l1 = np.empty(len(self.coefficients))
+        l1.fill(self.l1_penalty)
+        l2 = np.empty(len(self.coefficients))
+        l2.fill(2. * self.l2_penalty)
+        l1[0] = 0.
+        l2[0] = 0.
+        return l1, l2
+
+    #Update on new labeled reviews, at most max_steps mini-batch steps
+    #(None means one pass over the new data). Returns the average log
+    #likelihood of every batch, measured before its update.
+    def partial_fit(self, feature_matrix, sentiment, max_steps=None):
+        log_likelihood_all = []
+        batches = iter_minibatches(feature_matrix, sentiment, self.batch_size,
+                                   True, self.random_state)
+        for feature_batch, sentiment_batch in batches:
+            if max_steps is not None and len(log_likelihood_all) >= max_steps:
+                break
+            batch_rows = feature_batch.shape[0]
+            _, lp, gradient = logistic_pass(feature_batch, sentiment_batch,
+                                            self.coefficients, 0., chunk_size=batch_rows)
+            gradient /= batch_rows
+            if self.optimizer == 'sgd':
+                self._sgd_step(gradient)
+            else:
+                self._ftrl_step(gradient)
+            log_likelihood_all.append(lp / batch_rows)
+            self.num_steps += 1
+            self.num_seen += batch_rows
+        return log_likelihood_all
+
+    def _sgd_step(self, gradient):
+        gradient[1:] -= 2. * self.l2_penalty * self.coefficients[1:]
+        step_size = self.step_size / (1. + self.decay * self.num_steps)
+        self.coefficients += step_size * gradient
+
+    #FTRL minimizes a loss, so it works on the negated log likelihood gradient
+    def _ftrl_step(self, gradient):
+        g = -gradient
+        sigma = (np.sqrt(self.n + g * g) - np.sqrt(self.n)) / self.alpha
+        self.z += g - sigma * self.coefficients
+        self.n += g * g
+        l1, l2 = self._penalties()
+        shrunk = np.sign(self.z) * np.maximum(np.abs(self.z) - l1, 0.)
+        self.coefficients = -shrunk / ((self.beta + np.sqrt(self.n)) / self.alpha + l2)
+
+    def predict_probability(self, feature_matrix):
+        return sigmoid(feature_matrix.dot(self.coefficients))
+
+    #+1 / -1 like the notebooks' class predictions
+    def predict(self, feature_matrix):
+        return np.where(feature_matrix.dot(self.coefficients) > 0, 1, -1)
+
+    #Persist coefficients and optimizer state between processes. np.savez
+    #adds .npz to other paths, so save and load both use path + '.npz' then
+    def save(self, path):
+        path = _npz_path(path)
+        _, keys, position, has_gauss, cached_gaussian = self.random_state.get_state()
+        np.savez(path, coefficients=self.coefficients, z=self.z, n=self.n,
+                 counters=np.array([self.num_steps, self.num_seen]),
+                 random_keys=keys,
+                 random_position=np.array([position, has_gauss]),
+                 random_gaussian=np.array([cached_gaussian]),
+                 settings=np.array(json.dumps(self.settings())))
+
+    def settings(self):
+        return {'optimizer': self.optimizer, 'step_size': self.step_size,
+                'decay': self.decay, 'alpha': self.alpha, 'beta': self.beta,
+                'l1_penalty': self.l1_penalty, 'l2_penalty': self.l2_penalty,
+                'batch_size': self.batch_size}
+
+    @classmethod
+    def load(cls, path):
+        with np.load(_npz_path(path)) as data:
+            model = cls(len(data['coefficients']), **json.loads(str(data['settings'])))
+            model.coefficients = data['coefficients']
+            model.z = data['z']
+            model.n = data['n']
+            model.num_steps, model.num_seen = [int(c) for c in data['counters']]
+            position, has_gauss = [int(v) for v in data['random_position']]
+            model.random_state.set_state(('MT19937', data['random_keys'], position, has_gauss,
+                                          float(data['random_gaussian'][0])))
+        return model
+
@@ -0,0 +1,77 @@
+import numpy as np
+#Most positive and most negative predictions without a full sort
+#Analyzing product sentiment sorts giraffe_reviews by predicted_sentiment
+#just to read the first and last rows, and module 2 runs topk on the test
+#predictions for the 20 most positive and negative reviews. TopBottomK takes
+#prediction scores chunk by chunk and keeps only the k best and k worst rows
+#seen so far, using np.argpartition, so both tails come out of one O(n) pass
+#without materializing or sorting the whole prediction column.
+
+class TopBottomK(object):
+
+    def __init__(self, k):
+        if k < 1:
+            raise ValueError('k must be at least 1')
+        self.k = k
+        self.num_seen = 0
+        self.top_ids = np.zeros(0, dtype=np.int64)
+        self.top_scores = np.zeros(0)
+        self.bottom_ids = np.zeros(0, dtype=np.int64)
+        self.bottom_scores = np.zeros(0)
+
+    #ids default to the running row number, so with chunks of one column
+    #the results index straight into the original SFrame
+    def update(self, scores, ids=None):
+        scores = np.asarray(scores, dtype=np.float64)
+        if ids is None:
+            ids = np.arange(self.num_seen, self.num_seen + len(scores))
+        else:
+            ids = np.asarray(ids)
+        self.num_seen += len(scores)
+        self.top_ids, self.top_scores = self._keep(
+            np.concatenate([self.top_ids, ids]),
+            np.concatenate([self.top_scores, scores]), largest=True)
+        self.bottom_ids, self.bottom_scores = self._keep(
+            np.concatenate([self.bottom_ids, ids]),
+            np.concatenate([self.bottom_scores, scores]), largest=False)
+        return self
+
+    def _keep(self, ids, scores, largest):
+        if len(scores) <= self.k:
+            return ids, scores
+        if largest:
+            selected = np.argpartition(-scores, self.k - 1)[:self.k]
+        else:
+            selected = np.argpartition(scores, self.k - 1)[:self.k]
+        return ids[selected], scores[selected]
+
+    #(ids, scores) of the k highest scores, highest first
+    def top(self):
+        order = np.argsort(-self.top_scores, kind='mergesort')
+        return self.top_ids[order], self.top_scores[order]
+
+    #(ids, scores) of the k lowest scores, lowest first
+    def bottom(self):
+        order = np.argsort(self.bottom_scores, kind='mergesort')
+        return self.bottom_ids[order], self.bottom_scores[order]
+
+
+#scores can be an array, an SArray or any sliceable column
+#Returns ((top_ids, top_scores), (bottom_ids, bottom_scores))
+def top_bottom_k(scores, k, chunk_size=1000000):
+    selector = TopBottomK(k)
+    for start in range(0, len(scores), chunk_size):
+        selector.update(np.asarray(scores[start:start + chunk_size]))
+    return selector.top(), selector.bottom()
+
+
+#Same for a stream of score chunks, or of (ids, scores) pairs
+def top_bottom_k_stream(chunks, k):
+    selector = TopBottomK(k)
+    for chunk in chunks:
+        if isinstance(chunk, tuple):
+            ids, scores = chunk
+            selector.update(scores, ids)
+        else:
+            selector.update(chunk)
+    return selector.top(), selector.bottom()
@@ -0,0 +1,30 @@
+import ctypes
+from multiprocessing.sharedctypes import RawArray
+import numpy as np
+#numpy arrays in shared memory for process pools (Week 2, 3, 4 and 5)
+#share_array copies an array into a multiprocessing RawArray once. The
+#(buffer, dtype, shape) triple it returns is passed to the pool initializer,
+#and attach_array maps the same buffer as a numpy array in every worker
+#process without copying it again.
+
+_CTYPES = {np.dtype(np.float64): ctypes.c_double,
+           np.dtype(np.float32): ctypes.c_float,
+           np.dtype(np.int64): ctypes.c_int64,
+           np.dtype(np.int32): ctypes.c_int32,
+           np.dtype(np.uint8): ctypes.c_uint8}
+
+
+#Copy an array into shared memory, returns (buffer, dtype, shape)
+def share_array(array):
+    array = np.ascontiguousarray(array)
+    if array.dtype not in _CTYPES:
+        array = array.astype(np.float64)
+    buffer = RawArray(_CTYPES[array.dtype], max(array.size, 1))
+    np.frombuffer(buffer, dtype=array.dtype)[:array.size] = array.ravel()
+    return buffer, array.dtype.str, array.shape
+
+
+def attach_array(shared):
+    buffer, dtype, shape = shared
+    size = int(np.prod(shape))
+    return np.frombuffer(buffer, dtype=np.dtype(dtype))[:size].reshape(shape)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from classification_metrics import ClassificationEvaluator, evaluate_scores
+#The ROC curve and AUC must not depend on the order or the size of the
+#chunks, and must match the rank based AUC up to ties inside a bin
+
+
+def rank_auc(scores, labels):
+    ranks = np.empty(len(scores))
+    ranks[np.argsort(scores)] = np.arange(1, len(scores) + 1)
+    positive = labels == 1
+    num_positive = np.count_nonzero(positive)
+    num_negative = len(labels) - num_positive
+    return ((ranks[positive].sum() - num_positive * (num_positive + 1) / 2.)
+            / (num_positive * num_negative))
+
+
+def margin_data(num_rows=200000, scale=1., seed=0):
+    rng = np.random.RandomState(seed)
+    labels = np.where(rng.rand(num_rows) < 0.5, 1, -1)
+    scores = (rng.randn(num_rows) + 1.2 * (labels == 1)) * scale
+    return scores, labels
+
+
+def streamed_auc(scores, labels, chunk_sizes):
+    evaluator = ClassificationEvaluator()
+    start = 0
+    for chunk_size in chunk_sizes:
+        evaluator.update(scores[start:start + chunk_size], labels[start:start + chunk_size])
+        start += chunk_size
+    return evaluator.auc()
+
+
+@pytest.mark.parametrize('scale', [0.01, 1., 300.])
+def test_auc_matches_rank_auc(scale):
+    scores, labels = margin_data(scale=scale)
+    assert abs(evaluate_scores(scores, labels, chunk_size=50000)['auc']
+               - rank_auc(scores, labels)) < 1e-4
+
+
+def test_auc_independent_of_chunk_order_and_size():
+    scores, labels = margin_data()
+    order = np.argsort(scores)
+    shuffled = np.random.RandomState(1).permutation(len(scores))
+    expected = streamed_auc(scores, labels, [len(scores)])
+    #sorted stream, a narrow first chunk and a first chunk of one row
+    assert streamed_auc(scores[order], labels[order], [50000] * 4) == pytest.approx(expected, abs=1e-12)
+    assert streamed_auc(scores[shuffled], labels[shuffled], [1] + [9999] * 20 + [19]) == pytest.approx(expected, abs=1e-12)
+    assert streamed_auc(scores[order], labels[order], [1, 199999]) == pytest.approx(expected, abs=1e-12)
+    assert abs(expected - rank_auc(scores, labels)) < 1e-4
+
+
+def test_probability_auc_independent_of_chunk_order():
+    scores, labels = margin_data()
+    probabilities = 1. / (1. + np.exp(-scores))
+    order = np.argsort(probabilities)
+    evaluators = []
+    for rows in (np.arange(len(scores)), order):
+        evaluator = ClassificationEvaluator('probability')
+        for start in range(0, len(rows), 30000):
+            chunk = rows[start:start + 30000]
+            evaluator.update(probabilities[chunk], labels[chunk])
+        evaluators.append(evaluator)
+    assert evaluators[0].auc() == pytest.approx(evaluators[1].auc(), abs=1e-12)
+    assert abs(evaluators[0].auc() - rank_auc(probabilities, labels)) < 1e-3
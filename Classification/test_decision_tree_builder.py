@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from decision_tree_builder import decision_tree_create, weighted_decision_tree_create
+from decision_tree_bitset import decision_tree_create_bitset
+from tree_binning import decision_tree_create_numeric
+#The parallel build must give the same tree as the sequential one, including
+#small and shallow trees where the top of the tree is all leaves or no
+#pending subtree is big enough for a worker
+
+
+def binary_data(num_rows, num_features=12, seed=0):
+    rng = np.random.RandomState(seed)
+    feature_matrix = (rng.rand(num_rows, num_features) < rng.rand(num_features) * 0.6).astype(np.int64)
+    scores = feature_matrix.dot(rng.randn(num_features)) + rng.randn(num_rows) * 0.8
+    labels = np.where(scores > np.median(scores), 1, -1)
+    features = ['f.%d' % i for i in range(num_features)]
+    return feature_matrix, labels, features
+
+
+@pytest.mark.parametrize('max_depth, min_node_size, min_error_reduction, min_parallel_rows', [
+    (0, 1, 0.0, 10000),
+    (1, 1, 0.0, 10000),
+    (6, 10, 0.0, 10000),
+    (2, 0, -1, 50),
+    (6, 0, -1, 50),
+    (6, 100, 0.0, 200),
+])
+def test_parallel_matches_sequential(max_depth, min_node_size, min_error_reduction,
+                                     min_parallel_rows):
+    feature_matrix, labels, features = binary_data(3000)
+    sequential = decision_tree_create(feature_matrix, labels, features, max_depth,
+                                      min_node_size, min_error_reduction)
+    parallel = decision_tree_create(feature_matrix, labels, features, max_depth,
+                                    min_node_size, min_error_reduction, num_workers=3,
+                                    min_parallel_rows=min_parallel_rows)
+    assert parallel == sequential
+
+
+@pytest.mark.parametrize('max_depth, num_rows, min_parallel_rows', [
+    (1, 40000, 10000),
+    (1, 3000, 100),
+    (4, 3000, 100),
+])
+def test_weighted_parallel_matches_sequential(max_depth, num_rows, min_parallel_rows):
+    feature_matrix, labels, features = binary_data(num_rows, seed=1)
+    weights = np.random.RandomState(2).rand(num_rows)
+    sequential = weighted_decision_tree_create(feature_matrix, labels, features, weights,
+                                               max_depth)
+    parallel = weighted_decision_tree_create(feature_matrix, labels, features, weights,
+                                             max_depth, num_workers=2,
+                                             min_parallel_rows=min_parallel_rows)
+    assert parallel == sequential
+
+
+@pytest.mark.parametrize('max_depth, min_parallel_rows', [(4, 10000), (4, 200), (1, 100)])
+def test_numeric_parallel_matches_sequential(max_depth, min_parallel_rows):
+    rng = np.random.RandomState(3)
+    feature_matrix = rng.randn(20000, 4)
+    labels = np.where(feature_matrix[:, 0] + feature_matrix[:, 1] ** 2 > 1, 1, -1)
+    features = ['a', 'b', 'c', 'd']
+    sequential = decision_tree_create_numeric(feature_matrix, labels, features, max_depth)
+    parallel = decision_tree_create_numeric(feature_matrix, labels, features, max_depth,
+                                            num_workers=2, min_parallel_rows=min_parallel_rows)
+    assert parallel == sequential
+
+
+def count_nodes(tree):
+    if tree['is_leaf']:
+        return 1
+    return 1 + count_nodes(tree['left']) + count_nodes(tree['right'])
+
+
+#module 5 turns a node whose best split puts every row on one side into a leaf
+def test_stop_on_perfect_split():
+    feature_matrix = np.array([[0, 0], [0, 1], [0, 0], [0, 1]])
+    labels = np.array([1, 1, -1, -1])
+    assert count_nodes(decision_tree_create(feature_matrix, labels, ['a', 'b'], 10, 0, -1)) == 5
+    tree = decision_tree_create(feature_matrix, labels, ['a', 'b'], 10, 0, -1,
+                                stop_on_perfect_split=True)
+    assert tree['is_leaf'] and tree['prediction'] == -1
+    assert decision_tree_create_bitset(feature_matrix, labels, ['a', 'b'], 10, 0, -1,
+                                       stop_on_perfect_split=True) == tree
+
+
+@pytest.mark.parametrize('max_depth', [3, 8])
+def test_stop_on_perfect_split_backends_agree(max_depth):
+    feature_matrix, labels, features = binary_data(3000, num_features=15, seed=4)
+    sequential = decision_tree_create(feature_matrix, labels, features, max_depth, 0, -1,
+                                      stop_on_perfect_split=True)
+    parallel = decision_tree_create(feature_matrix, labels, features, max_depth, 0, -1,
+                                    num_workers=2, min_parallel_rows=300,
+                                    stop_on_perfect_split=True)
+    bitset = decision_tree_create_bitset(feature_matrix, labels, features, max_depth, 0, -1,
+                                         stop_on_perfect_split=True)
+    assert parallel == sequential
+    assert bitset == sequential
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+from tree_arrays import classify_batch
+from tree_binning import decision_tree_create_numeric
+from tree_codegen import compile_tree, tree_source
+from tree_nodes import create_leaf, create_split
+#Generated predictors must agree with classify_batch, also for the -inf
+#thresholds of columns like log(0)
+
+
+def test_infinite_threshold(tmpdir):
+    rng = np.random.RandomState(0)
+    feature_matrix = rng.randn(2000, 2)
+    feature_matrix[:300, 0] = -np.inf
+    labels = np.where((feature_matrix[:, 0] == -np.inf) | (feature_matrix[:, 1] > 0.5), 1, -1)
+    tree = decision_tree_create_numeric(feature_matrix, labels, ['a', 'b'], 3)
+    assert "float('-inf')" in tree_source(tree, ['a', 'b'])
+    classify = compile_tree(tree, ['a', 'b'], cache_dir=str(tmpdir))
+    expected = classify_batch(tree, feature_matrix, ['a', 'b'])
+    assert [classify(list(row)) for row in feature_matrix] == list(expected)
+
+
+def test_nan_threshold():
+    tree = create_split('a', create_leaf(1, 0), create_leaf(0, 1), threshold=float('nan'))
+    with pytest.raises(ValueError):
+        tree_source(tree, ['a'])
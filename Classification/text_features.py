@@ -0,0 +1,120 @@
+import string
+import zlib
+from array import array
+import numpy as np
+import scipy.sparse
+#Bag-of-words features for the review text (Week 1 and Week 2)
+#The notebooks count each of the 193 important_words with
+#products['review_clean'].apply(lambda s : s.split().count(word)), which
+#tokenizes every review once per word and builds one dense column per word.
+#count_vectorize tokenizes each review once, looks every token up in a
+#dict and writes the counts straight into a sparse CSR matrix.
+#hash_vectorize does the same for the open ended word_count features
+#without any vocabulary at all.
+
+_PUNCTUATION_BYTES = string.punctuation.encode('ascii')
+_PUNCTUATION_TABLE = dict((ord(c), None) for c in string.punctuation)
+
+
+#Same result as the notebooks' remove_punctuation for byte strings, and
+#also works on unicode text
+def remove_punctuation(text):
+    if isinstance(text, bytes):
+        return text.translate(None, _PUNCTUATION_BYTES)
+    return text.translate(_PUNCTUATION_TABLE)
+
+
+#Word -> column, column 0 is kept for the intercept when intercept=True
+#so the layout matches get_numpy_data(data, important_words, label)
+def build_vocabulary_index(vocabulary, intercept=True):
+    offset = 1 if intercept else 0
+    index = {}
+    for j, word in enumerate(vocabulary):
+        if word in index:
+            raise ValueError('duplicate word %r in vocabulary' % word)
+        index[word] = j + offset
+    return index
+
+
+#reviews is any iterable of cleaned review strings (an SArray, a list or
+#a generator), tokens are split on whitespace exactly like s.split()
+def count_vectorize(reviews, vocabulary, intercept=True, dtype=np.float64):
+    index = build_vocabulary_index(vocabulary, intercept)
+    num_columns = len(vocabulary) + (1 if intercept else 0)
+    indptr = array('l', [0])
+    indices = array('l')
+    counts = array('d')
+    for review in reviews:
+        row = {}
+        for token in review.split():
+            j = index.get(token)
+            if j is not None:
+                row[j] = row.get(j, 0) + 1
+        if intercept:
+            row[0] = 1
+        for j in sorted(row):
+            indices.append(j)
+            counts.append(row[j])
+        indptr.append(len(indices))
+    num_rows = len(indptr) - 1
+    return scipy.sparse.csr_matrix(
+        (np.frombuffer(counts, dtype=np.float64).astype(dtype),
+         np.frombuffer(indices, dtype=np.dtype('l')),
+         np.frombuffer(indptr, dtype=np.dtype('l'))),
+        shape=(num_rows, num_columns))
+
+
+#Column and sign of a token under the hashing trick
+#crc32 is stable across processes and python versions, unlike hash()
+#The low num_bits pick the column and bit 31 picks the sign, so words that
+#collide tend to cancel out instead of always adding up
+def hash_token(token, num_bits):
+    if not isinstance(token, bytes):
+        token = token.encode('utf-8')
+    h = zlib.crc32(token) & 0xffffffff
+    sign = -1. if h & 0x80000000 else 1.
+    return h & ((1 << num_bits) - 1), sign
+
+
+#Fixed width replacement for the dict-per-row word_count column
+#Every review maps into 2**num_bits columns no matter how large the corpus,
+#and no state is shared between rows so chunks can be hashed in parallel
+#and the results stacked with scipy.sparse.vstack
+#With intercept=True column 0 is reserved for the intercept and the words
+#hash into columns 1 .. 2**num_bits
+def hash_vectorize(reviews, num_bits=18, signed=True, lowercase=True,
+                   intercept=False, dtype=np.float64):
+    if not 1 <= num_bits <= 30:
+        raise ValueError('num_bits must be between 1 and 30, got %d' % num_bits)
+    offset = 1 if intercept else 0
+    cache = {}
+    indptr = array('l', [0])
+    indices = array('l')
+    values = array('d')
+    for review in reviews:
+        if lowercase:
+            review = review.lower()
+        row = {}
+        for token in review.split():
+            hashed = cache.get(token)
+            if hashed is None:
+                hashed = hash_token(token, num_bits)
+                cache[token] = hashed
+            j, sign = hashed
+            row[j + offset] = row.get(j + offset, 0.) + (sign if signed else 1.)
+        if intercept:
+            row[0] = 1.
+        for j in sorted(row):
+            if row[j] != 0:
+                indices.append(j)
+                values.append(row[j])
+        indptr.append(len(indices))
+        #the cache only saves rehashing common words, keep it bounded
+        if len(cache) > 100000:
+            cache.clear()
+    num_rows = len(indptr) - 1
+    return scipy.sparse.csr_matrix(
+        (np.frombuffer(values, dtype=np.float64).astype(dtype),
+         np.frombuffer(indices, dtype=np.dtype('l')),
+         np.frombuffer(indptr, dtype=np.dtype('l'))),
+        shape=(num_rows, (1 << num_bits) + offset))
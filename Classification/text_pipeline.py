@@ -0,0 +1,72 @@
+import multiprocessing
+from collections import Counter
+from itertools import islice
+from text_features import remove_punctuation
+#Parallel text cleaning for the amazon_baby reviews
+#The notebooks run remove_punctuation row by row through
+#products['review'].apply(...) and then graphlab.text_analytics.count_words.
+#preprocess_reviews splits the review column into chunks, a process pool
+#strips punctuation, lowercases and counts words for each chunk, and the
+#per-chunk vocabularies are merged at the end.
+
+#Clean and count one chunk of reviews
+#Returns the cleaned text, one word count dict per review (the layout of
+#the word_count column) and the total count of every word in the chunk
+def process_chunk(reviews, lowercase=True):
+    clean_reviews = []
+    word_counts = []
+    vocabulary = Counter()
+    for review in reviews:
+        clean = remove_punctuation(review)
+        if lowercase:
+            clean = clean.lower()
+        counts = Counter(clean.split())
+        clean_reviews.append(clean)
+        word_counts.append(dict(counts))
+        vocabulary.update(counts)
+    return clean_reviews, word_counts, vocabulary
+
+
+def _process_chunk_lower(reviews):
+    return process_chunk(reviews, True)
+
+
+def _process_chunk_keep_case(reviews):
+    return process_chunk(reviews, False)
+
+
+def iter_chunks(reviews, chunk_size):
+    reviews = iter(reviews)
+    while True:
+        chunk = list(islice(reviews, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+#reviews is any iterable of raw review strings, e.g. products['review']
+#Chunks are processed in order so row i of the result is review i
+#num_workers=1 runs in this process, None uses every core
+def preprocess_reviews(reviews, num_workers=None, chunk_size=10000, lowercase=True):
+    worker = _process_chunk_lower if lowercase else _process_chunk_keep_case
+    chunks = iter_chunks(reviews, chunk_size)
+    clean_reviews = []
+    word_counts = []
+    vocabulary = Counter()
+
+    def merge(results):
+        for clean, counts, chunk_vocabulary in results:
+            clean_reviews.extend(clean)
+            word_counts.extend(counts)
+            vocabulary.update(chunk_vocabulary)
+
+    if num_workers == 1:
+        merge(worker(chunk) for chunk in chunks)
+    else:
+        pool = multiprocessing.Pool(num_workers)
+        try:
+            merge(pool.imap(worker, chunks))
+        finally:
+            pool.close()
+            pool.join()
+    return clean_reviews, word_counts, vocabulary
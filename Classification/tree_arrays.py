@@ -0,0 +1,103 @@
+import numpy as np
+#Flat array form of the dict trees for batch prediction (Week 3, 4 and 5)
+#evaluate_classification_error runs data.apply(lambda x: classify(tree, x)),
+#one python walk over the nested dicts per row, and adaboost_with_tree_stumps
+#does the same every round. FlatTree stores the tree as parallel arrays
+#indexed by node id (the root is node 0):
+#  feature_id   column of the splitting feature, -1 for leaves
+#  left, right  child node ids (feature == 0 / feature != 0), -1 for leaves
+#  leaf_value   prediction of leaves, 0 for internal nodes
+#  threshold    split threshold of numeric splits (feature <= threshold goes
+#               left), NaN for the binary feature == 0 splits and for leaves
+#predict moves every row that has not reached a leaf down one level per step
+#with fancy indexing, so a batch costs a few vector operations per level.
+
+
+class FlatTree(object):
+
+    def __init__(self, feature_id, left, right, leaf_value, features, threshold=None):
+        self.feature_id = np.asarray(feature_id, dtype=np.int64)
+        self.left = np.asarray(left, dtype=np.int64)
+        self.right = np.asarray(right, dtype=np.int64)
+        self.leaf_value = np.asarray(leaf_value, dtype=np.int64)
+        self.features = list(features)
+        if threshold is None:
+            threshold = np.full(len(self.feature_id), np.nan)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+
+    @property
+    def num_nodes(self):
+        return len(self.feature_id)
+
+    def is_leaf(self):
+        return self.feature_id < 0
+
+    #Leaf node id reached by every row of feature_matrix, whose columns are
+    #in the order of features (e.g. test_data[features].to_numpy())
+    def apply(self, feature_matrix):
+        feature_matrix = np.asarray(feature_matrix)
+        if feature_matrix.ndim != 2 or feature_matrix.shape[1] != len(self.features):
+            raise ValueError('feature_matrix must have one column per feature (%d)'
+                             % len(self.features))
+        node = np.zeros(feature_matrix.shape[0], dtype=np.int64)
+        active = np.arange(feature_matrix.shape[0])
+        while len(active):
+            current = node[active]
+            internal = self.feature_id[current] >= 0
+            active = active[internal]
+            current = current[internal]
+            values = feature_matrix[active, self.feature_id[current]]
+            threshold = self.threshold[current]
+            binary = np.isnan(threshold)
+            goes_right = np.where(binary, values != 0, ~(values <= threshold))
+            node[active] = np.where(goes_right, self.right[current], self.left[current])
+        return node
+
+    def predict(self, feature_matrix):
+        return self.leaf_value[self.apply(feature_matrix)]
+
+
+#Compile a dict tree, nodes are numbered in depth first order (left first)
+def flatten_tree(tree, features):
+    features = list(features)
+    columns = dict((feature, i) for i, feature in enumerate(features))
+    feature_id, left, right, leaf_value, threshold = [], [], [], [], []
+    #(subtree, id of its parent, True if it is the right child)
+    stack = [(tree, -1, False)]
+    while stack:
+        node, parent, is_right = stack.pop()
+        node_id = len(feature_id)
+        if parent >= 0:
+            if is_right:
+                right[parent] = node_id
+            else:
+                left[parent] = node_id
+        left.append(-1)
+        right.append(-1)
+        if node['is_leaf']:
+            feature_id.append(-1)
+            leaf_value.append(node['prediction'])
+            threshold.append(np.nan)
+            continue
+        if node['splitting_feature'] not in columns:
+            raise ValueError('splitting feature %r is not in features' % node['splitting_feature'])
+        feature_id.append(columns[node['splitting_feature']])
+        leaf_value.append(0)
+        node_threshold = node.get('threshold')
+        threshold.append(np.nan if node_threshold is None else node_threshold)
+        stack.append((node['right'], node_id, True))
+        stack.append((node['left'], node_id, False))
+    return FlatTree(feature_id, left, right, leaf_value, features, threshold)
+
+
+#tree can be a dict tree or a FlatTree
+def classify_batch(tree, feature_matrix, features):
+    if not isinstance(tree, FlatTree):
+        tree = flatten_tree(tree, features)
+    return tree.predict(feature_matrix)
+
+
+#Same as evaluate_classification_error(tree, data) on numpy data
+def evaluate_classification_error(tree, feature_matrix, labels, features):
+    prediction = classify_batch(tree, feature_matrix, features)
+    return np.mean(prediction != np.asarray(labels))
@@ -0,0 +1,179 @@
+import numpy as np
+from decision_tree_builder import TreeBuilder
+from tree_nodes import create_split, node_mistakes
+from tree_split_search import TIE_TOLERANCE, label_matrix
+#Numeric threshold splits for the decision trees (Week 3, 4 and 5)
+#The tree modules one-hot encode every categorical column with
+#apply(lambda x: {x: 1}) + unpack + fillna and leave numeric columns like
+#dti, revol_util or int_rate out. Here every column is binned once into at
+#most 256 quantile bins (a uint8 code per value, the bin edges are values of
+#the column) and a node can split a column at any bin edge:
+#    left: feature <= threshold, right: feature > threshold
+#The label counts of every bin of every candidate column come from one
+#bincount over the node's rows, and the counts left of each threshold are
+#their cumulative sums, so the search is O(n + bins) per column. Columns
+#that only take the values 0 and 1 give the same splits as the binary
+#builders (threshold 0) and are used once per path like there, numeric
+#columns stay candidates below their own splits.
+
+MAX_BINS = 256
+
+
+#Sorted edges of at most max_bins quantile bins of a column, bin b holds the
+#values in (edges[b - 1], edges[b]]. Columns with few distinct values get one
+#bin per value. NaN are left out and end up in the last bin.
+def quantile_bin_edges(column, max_bins=MAX_BINS):
+    column = np.asarray(column, dtype=np.float64)
+    values = np.sort(column[~np.isnan(column)])
+    if len(values) == 0:
+        return np.zeros(1)
+    distinct = np.unique(values)
+    if len(distinct) <= max_bins:
+        return distinct
+    positions = np.ceil(np.arange(1, max_bins + 1) * len(values) / float(max_bins)).astype(np.int64) - 1
+    return np.unique(values[positions])
+
+
+def apply_bins(column, edges):
+    codes = np.searchsorted(edges, column, side='left')
+    return np.minimum(codes, len(edges) - 1).astype(np.uint8)
+
+
+#Returns (binned, thresholds): the n x d uint8 bin codes and the bin edges
+#of every column
+def bin_features(feature_matrix, max_bins=MAX_BINS):
+    if not 2 <= max_bins <= MAX_BINS:
+        raise ValueError('max_bins must be between 2 and %d' % MAX_BINS)
+    feature_matrix = np.asarray(feature_matrix)
+    binned = np.empty(feature_matrix.shape, dtype=np.uint8)
+    thresholds = []
+    for j in range(feature_matrix.shape[1]):
+        edges = quantile_bin_edges(feature_matrix[:, j], max_bins)
+        binned[:, j] = apply_bins(feature_matrix[:, j], edges)
+        thresholds.append(edges)
+    return binned, thresholds
+
+
+#Label counts of every bin of every candidate column on the node's rows,
+#c x bins x 3 in the [positive, negative, points] layout of label_matrix,
+#together with the totals of the node
+def bin_counts(binned, labels, rows, candidates, num_bins, weights=None):
+    labels = np.asarray(labels)[rows]
+    if weights is not None:
+        weights = np.asarray(weights)[rows]
+    columns = label_matrix(labels, weights)
+    width = int(num_bins.max()) if len(num_bins) else 1
+    codes = binned[np.ix_(rows, candidates)].astype(np.intp)
+    codes += np.arange(len(candidates)) * width
+    codes = codes.ravel()
+    size = len(candidates) * width
+    counts = np.empty((len(candidates), width, 3))
+    for k in range(3):
+        counts[:, :, k] = np.bincount(codes, weights=np.repeat(columns[:, k], len(candidates)),
+                                      minlength=size).reshape(len(candidates), width)
+    return counts, columns.sum(axis=0)
+
+
+#Best threshold split of a node, with the keys of tree_split_search.best_split
+#plus 'bin' (the split is bin code <= bin) and 'threshold'. Ties go to the
+#first column, then to the lowest threshold.
+def best_threshold_split(binned, thresholds, labels, rows, candidates, weights=None):
+    candidates = np.asarray(candidates, dtype=np.int64)
+    num_bins = np.array([len(thresholds[j]) for j in candidates], dtype=np.int64)
+    counts, totals = bin_counts(binned, labels, rows, candidates, num_bins, weights)
+    num_positive, num_negative, num_points = totals
+    mistakes = node_mistakes(num_positive, num_negative)
+    total = num_positive + num_negative
+    split = {'num_positive': num_positive,
+             'num_negative': num_negative,
+             'num_points': int(round(num_points)),
+             'node_mistakes': mistakes,
+             'error_before_split': mistakes / float(total) if total else 0.,
+             'feature': None,
+             'position': None}
+    #the last bin of a column holds its largest values, nothing is right of it
+    valid = np.arange(counts.shape[1]) < (num_bins - 1)[:, None]
+    if not valid.any() or total == 0:
+        return split
+    left = np.cumsum(counts, axis=1)
+    right = totals - left
+    left_mistakes = node_mistakes(left[:, :, 0], left[:, :, 1])
+    right_mistakes = node_mistakes(right[:, :, 0], right[:, :, 1])
+    errors = np.where(valid, (left_mistakes + right_mistakes) / float(total), np.inf)
+    flat = errors.ravel()
+    best = int(np.flatnonzero(flat <= flat.min() + TIE_TOLERANCE)[0])
+    position, bin_code = divmod(best, counts.shape[1])
+    feature = int(candidates[position])
+    split.update({
+        'feature': feature,
+        'position': position,
+        'bin': bin_code,
+        'threshold': float(thresholds[feature][bin_code]),
+        'errors': errors,
+        'error_after_split': errors[position, bin_code],
+        'left_positive': left[position, bin_code, 0],
+        'left_negative': left[position, bin_code, 1],
+        'left_points': int(round(left[position, bin_code, 2])),
+        'left_mistakes': left_mistakes[position, bin_code],
+        'right_positive': right[position, bin_code, 0],
+        'right_negative': right[position, bin_code, 1],
+        'right_points': int(round(right[position, bin_code, 2])),
+        'right_mistakes': right_mistakes[position, bin_code]})
+    return split
+
+
+class ThresholdTreeBuilder(TreeBuilder):
+
+    feature_dtype = np.uint8
+
+    #feature_matrix holds raw values, or the bin codes when thresholds (the
+    #bin edges of bin_features) are given
+    def __init__(self, feature_matrix, labels, features, thresholds=None,
+                 max_bins=MAX_BINS, **options):
+        if thresholds is None:
+            feature_matrix, thresholds = bin_features(feature_matrix, max_bins)
+        self.thresholds = [np.asarray(edges, dtype=np.float64) for edges in thresholds]
+        super(ThresholdTreeBuilder, self).__init__(feature_matrix, labels, features, **options)
+
+    def options(self):
+        options = super(ThresholdTreeBuilder, self).options()
+        options['thresholds'] = self.thresholds
+        return options
+
+    def find_split(self, start, stop, remaining):
+        return best_threshold_split(self.feature_matrix, self.thresholds, self.labels,
+                                    self.rows[start:stop], remaining, self.weights)
+
+    def goes_right(self, segment, split):
+        return self.feature_matrix[segment, split['feature']] > split['bin']
+
+    #0/1 columns have a single threshold and are used up by their split
+    def child_features(self, remaining, split):
+        if len(self.thresholds[split['feature']]) <= 2:
+            return np.delete(remaining, split['position'])
+        return remaining
+
+    def split_tree_node(self, split):
+        return create_split(self.features[split['feature']], None, None,
+                            threshold=split['threshold'])
+
+
+#decision_tree_create with threshold splits on raw numeric columns, e.g.
+#feature_matrix = loans[['grade', 'dti', 'revol_util', 'int_rate']].to_numpy()
+#after mapping grade to numbers. classify / FlatTree predict on raw values.
+def decision_tree_create_numeric(feature_matrix, labels, features, max_depth=10,
+                                 min_node_size=1, min_error_reduction=0.0,
+                                 max_bins=MAX_BINS, num_workers=1, min_parallel_rows=10000):
+    return ThresholdTreeBuilder(feature_matrix, labels, features, max_bins=max_bins,
+                                max_depth=max_depth, min_node_size=min_node_size,
+                                min_error_reduction=min_error_reduction
+                                ).build(num_workers, min_parallel_rows)
+
+
+#weighted_decision_tree_create with threshold splits
+def weighted_decision_tree_create_numeric(feature_matrix, labels, features, data_weights,
+                                          max_depth=10, max_bins=MAX_BINS,
+                                          num_workers=1, min_parallel_rows=10000):
+    return ThresholdTreeBuilder(feature_matrix, labels, features, max_bins=max_bins,
+                                weights=data_weights, weighted=True, max_depth=max_depth
+                                ).build(num_workers, min_parallel_rows)
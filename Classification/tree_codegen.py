@@ -0,0 +1,152 @@
+import hashlib
+import os
+import stat
+import sys
+import tempfile
+#Generated python predictors for single row scoring (Week 3, 4 and 5)
+#classify walks the nested dicts and looks every feature up by name, which is
+#most of the time spent scoring a single loan application. compile_tree turns
+#a trained tree into the source of a function of a positional feature array
+#    def classify(x):
+#        if x[12] == 0:
+#            if x[3] <= 13.5:
+#                return -1
+#            ...
+#and compile_adaboost does the same for the stump ensembles of
+#adaboost_with_tree_stumps, with the weighted votes added up in the order of
+#predict_adaboost. The source is written to a cache directory under a name
+#derived from its hash and imported from there, so a tree is only generated
+#once. x holds the values of features in order, e.g. row[features] as a list.
+#Cached files are executed when imported, so the cache directory (per user
+#by default) is created private and both the directory and the file must
+#belong to the current user and be writable by nobody else.
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'uw_tree_predictors')
+
+#the python tokenizer allows 100 levels of indentation
+MAX_DEPTH = 90
+
+
+def _feature_positions(features):
+    return dict((feature, i) for i, feature in enumerate(features))
+
+
+#Python source of a float, repr gives 'inf' which is not a name in the module
+def _float_literal(value):
+    value = float(value)
+    if value != value:
+        raise ValueError('NaN thresholds and weights are not supported')
+    if value in (float('inf'), float('-inf')):
+        return "float('%r')" % value
+    return repr(value)
+
+
+def _condition(node, positions):
+    feature = node['splitting_feature']
+    if feature not in positions:
+        raise ValueError('splitting feature %r is not in features' % feature)
+    threshold = node.get('threshold')
+    if threshold is None:
+        return 'x[%d] == 0' % positions[feature]
+    return 'x[%d] <= %s' % (positions[feature], _float_literal(threshold))
+
+
+#Nested if statements of a tree, one list entry per line
+def _tree_lines(tree, positions, indent, depth=0):
+    pad = '    ' * indent
+    if tree['is_leaf']:
+        return [pad + 'return %d' % tree['prediction']]
+    if depth >= MAX_DEPTH:
+        raise ValueError('trees deeper than %d levels are not supported' % MAX_DEPTH)
+    return ([pad + 'if %s:' % _condition(tree, positions)]
+            + _tree_lines(tree['left'], positions, indent + 1, depth + 1)
+            + [pad + 'else:']
+            + _tree_lines(tree['right'], positions, indent + 1, depth + 1))
+
+
+#Conditional expression of the weighted vote of a tree
+def _vote_expression(tree, weight, positions, depth=0):
+    if tree['is_leaf']:
+        return _float_literal(weight * tree['prediction'])
+    if depth >= MAX_DEPTH:
+        raise ValueError('trees deeper than %d levels are not supported' % MAX_DEPTH)
+    return '(%s if %s else %s)' % (_vote_expression(tree['left'], weight, positions, depth + 1),
+                                   _condition(tree, positions),
+                                   _vote_expression(tree['right'], weight, positions, depth + 1))
+
+
+def tree_source(tree, features, function_name='classify'):
+    positions = _feature_positions(features)
+    lines = ['def %s(x):' % function_name] + _tree_lines(tree, positions, 1)
+    return '\n'.join(lines) + '\n'
+
+
+#Same result as predict_adaboost(stump_weights, tree_stumps, data) for one row
+def adaboost_source(stump_weights, tree_stumps, features, function_name='predict_adaboost'):
+    if len(stump_weights) != len(tree_stumps):
+        raise ValueError('%d weights for %d stumps' % (len(stump_weights), len(tree_stumps)))
+    positions = _feature_positions(features)
+    lines = ['def %s(x):' % function_name, '    score = 0.0']
+    for weight, stump in zip(stump_weights, tree_stumps):
+        lines.append('    score += %s' % _vote_expression(stump, float(weight), positions))
+    lines.append('    return 1 if score > 0 else -1')
+    return '\n'.join(lines) + '\n'
+
+
+def _load_module(name, path):
+    if sys.version_info[0] < 3:
+        import imp
+        return imp.load_source(name, path)
+    from importlib.util import module_from_spec, spec_from_file_location
+    spec = spec_from_file_location(name, path)
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+#Refuse paths another user owns or could have written to
+def _check_private(path):
+    if not hasattr(os, 'getuid'):
+        return
+    info = os.stat(path)
+    if info.st_uid != os.getuid():
+        raise ValueError('%s is not owned by the current user' % path)
+    if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise ValueError('%s is writable by other users' % path)
+
+
+#Write the source to cache_dir (once per distinct source) and import it
+def load_source(source, function_name, cache_dir=None):
+    if cache_dir is None:
+        cache_dir = DEFAULT_CACHE_DIR
+    if not os.path.isdir(cache_dir):
+        try:
+            os.makedirs(cache_dir, 0o700)
+        except OSError:
+            if not os.path.isdir(cache_dir):
+                raise
+    _check_private(cache_dir)
+    digest = hashlib.sha1(source.encode('utf-8')).hexdigest()
+    name = 'tree_%s' % digest
+    path = os.path.join(cache_dir, name + '.py')
+    if not os.path.exists(path):
+        #write to a temporary file first so readers never see half a module
+        handle, temporary = tempfile.mkstemp(suffix='.py', dir=cache_dir)
+        with os.fdopen(handle, 'w') as f:
+            f.write(source)
+        os.rename(temporary, path)
+    _check_private(path)
+    return getattr(_load_module(name, path), function_name)
+
+
+#Returns classify(x) for x = [value of features[0], value of features[1], ...]
+def compile_tree(tree, features, cache_dir=None):
+    return load_source(tree_source(tree, features), 'classify', cache_dir)
+
+
+#Returns predict_adaboost(x) for one positional row, see compile_tree
+def compile_adaboost(stump_weights, tree_stumps, features, cache_dir=None):
+    return load_source(adaboost_source(stump_weights, tree_stumps, features),
+                       'predict_adaboost', cache_dir)
@@ -0,0 +1,83 @@
+import numpy as np
+#Shared pieces of the decision tree builders (Week 3, 4 and 5)
+#Trees are the nested dicts used in the notebooks, so classify, count_nodes
+#and print_stump work on trees from any of the builders:
+#    {'is_leaf': False, 'prediction': None, 'splitting_feature': 'grade.A',
+#     'left': <subtree for grade.A == 0>, 'right': <subtree for grade.A == 1>}
+#Splits on numeric features (tree_binning) also have a 'threshold' key, their
+#left subtree is for feature <= threshold and the right one for the rest.
+
+
+#Majority class leaf. Ties go to tie_label: -1 like create_leaf in
+#modules 5 and 6, +1 like the weighted create_leaf in module 8
+def create_leaf(num_positive, num_negative, tie_label=-1):
+    if num_positive > num_negative:
+        prediction = +1
+    elif num_positive < num_negative:
+        prediction = -1
+    else:
+        prediction = tie_label
+    return {'splitting_feature' : None,
+            'left' : None,
+            'right' : None,
+            'is_leaf': True,
+            'prediction': prediction}
+
+
+def create_split(splitting_feature, left_tree, right_tree, threshold=None):
+    node = {'is_leaf'          : False,
+            'prediction'       : None,
+            'splitting_feature': splitting_feature,
+            'left'             : left_tree,
+            'right'            : right_tree}
+    if threshold is not None:
+        node['threshold'] = threshold
+    return node
+
+
+#True if x goes to the left subtree of the split node
+def goes_left(node, value):
+    threshold = node.get('threshold')
+    if threshold is None:
+        return value == 0
+    return value <= threshold
+
+
+#Mistakes of the majority classifier, intermediate_node_num_mistakes on counts
+def node_mistakes(num_positive, num_negative):
+    return np.minimum(num_positive, num_negative)
+
+
+#Error of splitting on every candidate feature at once
+#right_* are the (weighted) label counts where the feature is 1, total_* the
+#counts of the whole node, the feature == 0 side is found by subtraction.
+#Returns (errors, left_mistakes, right_mistakes), with errors divided by
+#the node size like best_splitting_feature
+def evaluate_splits(right_positive, right_negative, total_positive, total_negative):
+    left_mistakes = node_mistakes(total_positive - right_positive, total_negative - right_negative)
+    right_mistakes = node_mistakes(right_positive, right_negative)
+    total = float(total_positive + total_negative)
+    errors = (left_mistakes + right_mistakes) / total
+    return errors, left_mistakes, right_mistakes
+
+
+def count_nodes(tree):
+    if tree['is_leaf']:
+        return 1
+    return 1 + count_nodes(tree['left']) + count_nodes(tree['right'])
+
+
+def count_leaves(tree):
+    if tree['is_leaf']:
+        return 1
+    return count_leaves(tree['left']) + count_leaves(tree['right'])
+
+
+#Same walk as classify in the notebooks, x maps feature names to values
+def classify(tree, x):
+    while not tree['is_leaf']:
+        if goes_left(tree, x[tree['splitting_feature']]):
+            tree = tree['left']
+        else:
+            tree = tree['right']
+    return tree['prediction']
@@ -0,0 +1,159 @@
+import itertools
+import numpy as np
+from decision_tree_builder import TreeBuilder
+from tree_nodes import create_leaf, create_split
+#Regularization path of the module 6 trees (Week 4)
+#Module 6 builds my_decision_tree_new, my_decision_tree_old and model_1 to
+#model_9 from scratch for every max_depth, min_node_size and
+#min_error_reduction it looks at. The best split of a node does not depend on
+#these settings, they only decide where the tree stops, so every one of those
+#trees is a truncation of a single deep tree built with early stopping off.
+#TreePath builds that tree once with the stats of every node (size, mistakes,
+#error reduction, depth and the prediction it would have as a leaf) and cuts
+#it back for any setting. error_curve scores a whole grid of settings from
+#the root-to-leaf paths of the rows, found once per dataset.
+
+
+class TreePath(object):
+
+    #max_depth bounds the depths that can be extracted later, options go to
+    #builder_class (e.g. ThresholdTreeBuilder with max_bins)
+    def __init__(self, feature_matrix, labels, features, max_depth=14,
+                 builder_class=TreeBuilder, num_workers=1, min_parallel_rows=10000, **options):
+        self.features = list(features)
+        self.max_depth = max_depth
+        builder = builder_class(feature_matrix, labels, features, max_depth=max_depth,
+                                min_node_size=0, min_error_reduction=-np.inf,
+                                record_stats=True, **options)
+        self.full_tree = builder.build(num_workers, min_parallel_rows)
+        self._flatten()
+
+    #Same decision as the module 6 stopping conditions for the node
+    @staticmethod
+    def stops(stats, max_depth, min_node_size, min_error_reduction):
+        return (stats['depth'] >= max_depth
+                or stats['num_points'] <= min_node_size
+                or stats['error_reduction'] is None
+                or stats['error_reduction'] <= min_error_reduction)
+
+    def _check_depth(self, max_depth):
+        if max_depth > self.max_depth:
+            raise ValueError('the path was built up to max_depth=%d' % self.max_depth)
+
+    #Same tree as decision_tree_create(..., max_depth, min_node_size,
+    #min_error_reduction), without the stats
+    def tree(self, max_depth=10, min_node_size=1, min_error_reduction=0.0):
+        self._check_depth(max_depth)
+
+        def cut(node):
+            stats = node['stats']
+            if node['is_leaf'] or self.stops(stats, max_depth, min_node_size, min_error_reduction):
+                return create_leaf(stats['num_positive'], stats['num_negative'],
+                                   tie_label=stats['prediction'])
+            return create_split(node['splitting_feature'], cut(node['left']), cut(node['right']),
+                                threshold=node.get('threshold'))
+        return cut(self.full_tree)
+
+    #Node arrays of the full tree in depth first order
+    def _flatten(self):
+        stats_keys = ('depth', 'num_points', 'error_reduction', 'prediction')
+        columns = dict((key, []) for key in stats_keys + ('feature_id', 'threshold', 'left', 'right'))
+        positions = dict((feature, i) for i, feature in enumerate(self.features))
+        stack = [(self.full_tree, -1, 'left')]
+        while stack:
+            node, parent, side = stack.pop()
+            node_id = len(columns['depth'])
+            if parent >= 0:
+                columns[side][parent] = node_id
+            stats = node['stats']
+            for key in stats_keys:
+                columns[key].append(stats[key])
+            columns['left'].append(-1)
+            columns['right'].append(-1)
+            if node['is_leaf']:
+                columns['feature_id'].append(-1)
+                columns['threshold'].append(np.nan)
+                continue
+            columns['feature_id'].append(positions[node['splitting_feature']])
+            threshold = node.get('threshold')
+            columns['threshold'].append(np.nan if threshold is None else threshold)
+            stack.append((node['right'], node_id, 'right'))
+            stack.append((node['left'], node_id, 'left'))
+        self.depth = np.array(columns['depth'], dtype=np.int64)
+        self.num_points = np.array(columns['num_points'], dtype=np.int64)
+        #leaves of the full tree never split, whatever the settings
+        self.error_reduction = np.array([-np.inf if r is None else r
+                                         for r in columns['error_reduction']])
+        self.prediction = np.array(columns['prediction'], dtype=np.int64)
+        self.feature_id = np.array(columns['feature_id'], dtype=np.int64)
+        self.threshold = np.array(columns['threshold'])
+        self.left = np.array(columns['left'], dtype=np.int64)
+        self.right = np.array(columns['right'], dtype=np.int64)
+
+    #n x (max_depth + 1) node ids visited by every row, rows that reach a leaf
+    #stay there
+    def paths(self, feature_matrix):
+        feature_matrix = np.asarray(feature_matrix)
+        num_rows = feature_matrix.shape[0]
+        paths = np.zeros((num_rows, self.max_depth + 1), dtype=np.int64)
+        rows = np.arange(num_rows)
+        for level in range(1, self.max_depth + 1):
+            node = paths[:, level - 1]
+            internal = self.feature_id[node] >= 0
+            node = node.copy()
+            current = node[internal]
+            values = feature_matrix[rows[internal], self.feature_id[current]]
+            threshold = self.threshold[current]
+            goes_right = np.where(np.isnan(threshold), values != 0, ~(values <= threshold))
+            node[internal] = np.where(goes_right, self.right[current], self.left[current])
+            paths[:, level] = node
+        return paths
+
+    def _stop_mask(self, max_depth, min_node_size, min_error_reduction):
+        return ((self.feature_id < 0) | (self.depth >= max_depth)
+                | (self.num_points <= min_node_size)
+                | (self.error_reduction <= min_error_reduction))
+
+    #Predictions of tree(max_depth, ...) from precomputed paths
+    def predict_paths(self, paths, max_depth=10, min_node_size=1, min_error_reduction=0.0):
+        self._check_depth(max_depth)
+        stopped = self._stop_mask(max_depth, min_node_size, min_error_reduction)[paths]
+        first = np.argmax(stopped, axis=1)
+        return self.prediction[paths[np.arange(len(paths)), first]]
+
+    def predict(self, feature_matrix, max_depth=10, min_node_size=1, min_error_reduction=0.0):
+        return self.predict_paths(self.paths(feature_matrix), max_depth, min_node_size,
+                                  min_error_reduction)
+
+    #Leaves of tree(max_depth, ...) without building it: nodes that are
+    #reached (no stopped ancestor) and stop themselves
+    def num_leaves(self, max_depth=10, min_node_size=1, min_error_reduction=0.0):
+        stopped = self._stop_mask(max_depth, min_node_size, min_error_reduction)
+        reached = np.zeros(len(stopped), dtype=bool)
+        reached[0] = True
+        #depth first order puts parents before their children
+        for node in np.flatnonzero(self.feature_id >= 0):
+            if reached[node] and not stopped[node]:
+                reached[self.left[node]] = True
+                reached[self.right[node]] = True
+        return int(np.count_nonzero(reached & stopped))
+
+    #Classification error and number of leaves for every combination of the
+    #settings, as a list of dicts (graphlab.SFrame(...) gives a table)
+    def error_curve(self, feature_matrix, labels, max_depths=None, min_node_sizes=(0,),
+                    min_error_reductions=(-1,)):
+        if max_depths is None:
+            max_depths = range(self.max_depth + 1)
+        labels = np.asarray(labels)
+        paths = self.paths(feature_matrix)
+        curve = []
+        for max_depth, min_node_size, min_error_reduction in itertools.product(
+                max_depths, min_node_sizes, min_error_reductions):
+            prediction = self.predict_paths(paths, max_depth, min_node_size, min_error_reduction)
+            curve.append({'max_depth': max_depth,
+                          'min_node_size': min_node_size,
+                          'min_error_reduction': min_error_reduction,
+                          'num_leaves': self.num_leaves(max_depth, min_node_size,
+                                                        min_error_reduction),
+                          'error': float(np.mean(prediction != labels))})
+        return curve
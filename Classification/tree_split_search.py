@@ -0,0 +1,110 @@
+import numpy as np
+from tree_nodes import evaluate_splits, node_mistakes
+#Vectorized split search for the binary decision trees (Week 3, 4 and 5)
+#best_splitting_feature loops over the features in python and calls
+#intermediate_node_num_mistakes on two filtered label arrays for each one.
+#Here the label counts on the feature == 1 side of every candidate feature
+#come from a single matrix product
+#    X[rows, candidates]^T . [y == +1, y == -1, 1]
+#the feature == 0 side is the node total minus that, and the best feature is
+#the first one with the lowest error, like the loop in the notebooks.
+#Weighted errors that only differ by rounding (e.g. every split of a node
+#keeping the majority label on both sides) count as ties, so the first
+#feature wins there as well instead of whichever sum rounded lowest.
+#Passing data_weights gives the weighted counts of module 8 from the same
+#product, with the positive and negative columns multiplied by the weights.
+
+#errors closer than this to the lowest one are ties, shared by every tree
+#and stump learner so they all break ties the same way
+TIE_TOLERANCE = 1e-12
+
+
+#n x 3 matrix of [weight of +1 labels, weight of -1 labels, 1]
+def label_matrix(labels, weights=None):
+    labels = np.asarray(labels)
+    columns = np.empty((len(labels), 3))
+    columns[:, 0] = (labels == +1)
+    columns[:, 1] = (labels == -1)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)
+        columns[:, 0] *= weights
+        columns[:, 1] *= weights
+    columns[:, 2] = 1.
+    return columns
+
+
+#Gather the node's rows (and candidate columns) of the feature matrix
+def node_features(feature_matrix, rows=None, candidates=None):
+    if rows is None and candidates is None:
+        return feature_matrix
+    if rows is None:
+        return feature_matrix[:, candidates]
+    if candidates is None:
+        return feature_matrix[rows]
+    return feature_matrix[np.ix_(rows, candidates)]
+
+
+#Label counts of a node and of the feature == 1 side of every candidate
+#Returns (right_counts, totals): right_counts is c x 3 and totals has 3
+#entries, both in the [positive, negative, points] layout of label_matrix
+def split_counts(feature_matrix, labels, rows=None, candidates=None, weights=None):
+    if rows is not None:
+        labels = np.asarray(labels)[rows]
+        if weights is not None:
+            weights = np.asarray(weights)[rows]
+    columns = label_matrix(labels, weights)
+    right_counts = np.dot(node_features(feature_matrix, rows, candidates).T, columns)
+    return right_counts, columns.sum(axis=0)
+
+
+#Best split of a node together with everything the builders need for their
+#stopping checks, so nothing is recomputed after the search:
+#  feature             column of the best feature (None without candidates)
+#  position            its position in candidates
+#  errors              error of every candidate, like best_splitting_feature
+#  error_before_split  node mistakes / node size (weighted: / total weight)
+#  error_after_split   errors[position]
+#  num_positive, num_negative, num_points, node_mistakes of the node
+#  left_* / right_*    positive, negative, points and mistakes of each side
+def best_split(feature_matrix, labels, rows=None, candidates=None, weights=None):
+    right_counts, totals = split_counts(feature_matrix, labels, rows, candidates, weights)
+    num_positive, num_negative, num_points = totals
+    mistakes = node_mistakes(num_positive, num_negative)
+    total = num_positive + num_negative
+    split = {'num_positive': num_positive,
+             'num_negative': num_negative,
+             'num_points': int(round(num_points)),
+             'node_mistakes': mistakes,
+             'error_before_split': mistakes / float(total) if total else 0.,
+             'feature': None,
+             'position': None}
+    if right_counts.shape[0] == 0 or total == 0:
+        return split
+    errors, left_mistakes, right_mistakes = evaluate_splits(
+        right_counts[:, 0], right_counts[:, 1], num_positive, num_negative)
+    position = int(np.flatnonzero(errors <= errors.min() + TIE_TOLERANCE)[0])
+    right_positive, right_negative, right_points = right_counts[position]
+    split.update({
+        'feature': position if candidates is None else int(np.asarray(candidates)[position]),
+        'position': position,
+        'errors': errors,
+        'error_after_split': errors[position],
+        'left_positive': num_positive - right_positive,
+        'left_negative': num_negative - right_negative,
+        'left_points': int(round(num_points - right_points)),
+        'left_mistakes': left_mistakes[position],
+        'right_positive': right_positive,
+        'right_negative': right_negative,
+        'right_points': int(round(right_points)),
+        'right_mistakes': right_mistakes[position]})
+    return split
+
+
+#Drop in for best_splitting_feature(data, features, target[, data_weights])
+#on numpy data: feature_matrix holds the columns of all_features in order
+def best_splitting_feature(feature_matrix, labels, features, all_features, data_weights=None):
+    candidates = [all_features.index(f) for f in features]
+    split = best_split(feature_matrix, labels, candidates=candidates, weights=data_weights)
+    if split['feature'] is None:
+        return None
+    return all_features[split['feature']]
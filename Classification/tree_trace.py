@@ -0,0 +1,135 @@
+import csv
+import json
+from decision_tree_builder import TreeBuilder
+#Structured trace of a decision tree build (Week 3, 4 and 5)
+#decision_tree_create prints a banner and a stopping condition message at
+#every node, which on deep trees costs more than it tells. Pass a BuildTrace
+#to TreeBuilder (or trace_decision_tree_create) instead: it keeps one record
+#per node with
+#  node_id          heap numbering, root 1, children 2i (left) and 2i + 1
+#  parent_id        node_id // 2, 0 for the root
+#  depth, num_rows
+#  search_time      seconds spent in the split search
+#  partition_time   seconds spent deciding and partitioning the rows
+#  feature          best splitting feature found (also for nodes that stop
+#                   after the search), threshold for numeric splits
+#  error_before, error_after  classification error of the node and of the
+#                   best split
+#  reason           'split' or why the node stopped ('no mistakes',
+#                   'max depth', 'min node size', 'min error reduction', ...)
+#Records export to JSON, CSV and to folded stacks ("root;grade.A;term 812")
+#that flamegraph.pl or speedscope turn into a flame graph of the build cost.
+
+FIELDS = ('node_id', 'parent_id', 'depth', 'num_rows', 'search_time', 'partition_time',
+          'feature', 'threshold', 'error_before', 'error_after', 'reason')
+
+
+class BuildTrace(object):
+
+    def __init__(self):
+        self.records = []
+
+    def record(self, node_id, depth, num_rows, search_time, partition_time, split, feature,
+               reason):
+        if split['feature'] is None:
+            error_after = None
+        else:
+            error_after = float(split['error_after_split'])
+        self.records.append({'node_id': int(node_id),
+                             'parent_id': int(node_id) // 2,
+                             'depth': int(depth),
+                             'num_rows': int(num_rows),
+                             'search_time': search_time,
+                             'partition_time': partition_time,
+                             'feature': feature,
+                             'threshold': split.get('threshold'),
+                             'error_before': float(split['error_before_split']),
+                             'error_after': error_after,
+                             'reason': 'split' if reason is None else reason})
+
+    #Records of subtrees built in other processes
+    def extend(self, records):
+        self.records.extend(records)
+
+    def pop_records(self):
+        records, self.records = self.records, []
+        return records
+
+    def __len__(self):
+        return len(self.records)
+
+    #Records sorted by node_id, i.e. level by level
+    def sorted_records(self):
+        return sorted(self.records, key=lambda record: record['node_id'])
+
+    def total_time(self):
+        return sum(r['search_time'] + r['partition_time'] for r in self.records)
+
+    #{reason: number of nodes}
+    def stopping_reasons(self):
+        counts = {}
+        for record in self.records:
+            counts[record['reason']] = counts.get(record['reason'], 0) + 1
+        return counts
+
+    #[(depth, number of nodes, rows, seconds)], where the build time goes
+    def time_by_depth(self):
+        levels = {}
+        for record in self.records:
+            level = levels.setdefault(record['depth'], [0, 0, 0.])
+            level[0] += 1
+            level[1] += record['num_rows']
+            level[2] += record['search_time'] + record['partition_time']
+        return [(depth,) + tuple(levels[depth]) for depth in sorted(levels)]
+
+    def to_json(self, path=None):
+        text = json.dumps(self.sorted_records())
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def to_csv(self, path):
+        with open(path, 'w') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            for record in self.sorted_records():
+                writer.writerow(record)
+
+    #Folded stacks, one line per node: the features on the path from the
+    #root and the node's own time in microseconds
+    def folded_stacks(self):
+        names = {}
+        for record in self.records:
+            if record['reason'] == 'split':
+                names[record['node_id']] = record['feature']
+            else:
+                names[record['node_id']] = 'leaf (%s)' % record['reason']
+        lines = []
+        for record in self.sorted_records():
+            frames = []
+            node_id = record['node_id']
+            while node_id >= 1:
+                frames.append(names.get(node_id, '?'))
+                node_id //= 2
+            micros = int(round(1e6 * (record['search_time'] + record['partition_time'])))
+            lines.append('%s %d' % (';'.join(['root'] + frames[::-1]), micros))
+        return lines
+
+    def to_folded(self, path):
+        with open(path, 'w') as f:
+            for line in self.folded_stacks():
+                f.write(line + '\n')
+
+
+#decision_tree_create that also returns its BuildTrace, with data_weights it
+#builds weighted_decision_tree_create trees (module 8 rules)
+def trace_decision_tree_create(feature_matrix, labels, features, max_depth=10,
+                               min_node_size=1, min_error_reduction=0.0, data_weights=None,
+                               num_workers=1, min_parallel_rows=10000):
+    trace = BuildTrace()
+    builder = TreeBuilder(feature_matrix, labels, features, weights=data_weights,
+                          weighted=data_weights is not None, max_depth=max_depth,
+                          min_node_size=min_node_size,
+                          min_error_reduction=min_error_reduction, trace=trace)
+    return builder.build(num_workers, min_parallel_rows), trace
@@ -0,0 +1,113 @@
+import json
+import os
+import numpy as np
+#Save and load a k-nearest neighbors regression model (Week 6)
+#A model is a directory with one .npy file per array plus model.json,
+#so load_knn_model can map the training data straight from disk with
+#np.load(mmap_mode='r') instead of rebuilding features_train and norms
+#from the SFrame every run
+
+KNN_MODEL_VERSION = 1
+KNN_MODEL_META = 'model.json'
+
+#Prebuilt index for fast distance computation
+#||q - x||^2 = ||x||^2 - 2 q.x + ||q||^2, so storing ||x||^2 for every
+#training house turns a batch of distances into one matrix product
+def build_knn_index(feature_matrix):
+    feature_matrix = np.asarray(feature_matrix, dtype=np.float64)
+    row_sq_norms = np.einsum('ij,ij->i', feature_matrix, feature_matrix)
+    return {'row_sq_norms': row_sq_norms}
+
+
+#feature_matrix is the NORMALIZED training matrix, norms the training norms
+#returned by normalize_features, output the training prices
+def save_knn_model(path, feature_matrix, norms, output, feature_list, index=None):
+    feature_matrix = np.ascontiguousarray(feature_matrix, dtype=np.float64)
+    norms = np.ascontiguousarray(norms, dtype=np.float64)
+    output = np.ascontiguousarray(output, dtype=np.float64)
+    if feature_matrix.ndim != 2:
+        raise ValueError('feature_matrix must be 2-dimensional')
+    if len(output) != feature_matrix.shape[0]:
+        raise ValueError('output has %d rows, feature_matrix has %d'
+                         % (len(output), feature_matrix.shape[0]))
+    if len(norms) != feature_matrix.shape[1]:
+        raise ValueError('norms has %d entries, feature_matrix has %d columns'
+                         % (len(norms), feature_matrix.shape[1]))
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    arrays = {'features': feature_matrix, 'norms': norms, 'output': output}
+    if index is not None:
+        for name in index:
+            arrays['index_' + name] = np.ascontiguousarray(index[name])
+    for name in arrays:
+        np.save(os.path.join(path, name + '.npy'), arrays[name])
+    meta = {'version': KNN_MODEL_VERSION,
+            'feature_list': list(feature_list),
+            'num_train': feature_matrix.shape[0],
+            'num_features': feature_matrix.shape[1],
+            'index': sorted(index.keys()) if index is not None else []}
+    #metadata is written last so a half written model never loads
+    with open(os.path.join(path, KNN_MODEL_META), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+
+#Returns a dict with features, norms, output, feature_list and index
+#Arrays are memory-mapped read only, nothing is read until it is used
+def load_knn_model(path, mmap_mode='r'):
+    with open(os.path.join(path, KNN_MODEL_META)) as f:
+        meta = json.load(f)
+    if meta['version'] != KNN_MODEL_VERSION:
+        raise ValueError('unsupported knn model version %r' % meta['version'])
+
+    def load(name):
+        return np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode)
+
+    index = {}
+    for name in meta['index']:
+        index[name] = load('index_' + name)
+    return {'features': load('features'),
+            'norms': load('norms'),
+            'output': load('output'),
+            'feature_list': meta['feature_list'],
+            'index': index}
+
+
+#Squared distances from every query to every training house
+def squared_distances(model, query_set):
+    features = model['features']
+    row_sq_norms = model['index'].get('row_sq_norms')
+    if row_sq_norms is None:
+        row_sq_norms = np.einsum('ij,ij->i', features, features)
+    query_sq_norms = np.einsum('ij,ij->i', query_set, query_set)
+    dist = np.dot(query_set, features.T)
+    dist *= -2
+    dist += row_sq_norms
+    dist += query_sq_norms[:, np.newaxis]
+    #rounding can leave tiny negative values for exact matches
+    np.maximum(dist, 0, out=dist)
+    return dist
+
+
+#Vectorized version of multiple_prediction on a loaded model
+#query_set holds raw rows as returned by get_numpy_data, they are
+#divided by the stored training norms here
+#Queries are processed chunk_size at a time to bound the distance matrix
+def knn_predict(model, k, query_set, chunk_size=1024):
+    query_set = np.atleast_2d(np.asarray(query_set, dtype=np.float64))
+    num_train = model['features'].shape[0]
+    if k < 1 or k > num_train:
+        raise ValueError('k must be between 1 and %d' % num_train)
+    output = model['output']
+    #zero norms count as 1 like Normalizer.safe_norms, all-zero training
+    #columns would otherwise make every distance nan
+    norms = np.where(model['norms'] > 0, model['norms'], 1.0)
+    predictions = np.empty(query_set.shape[0])
+    for start in range(0, query_set.shape[0], chunk_size):
+        query = query_set[start:start + chunk_size] / norms
+        dist = squared_distances(model, query)
+        if k < num_train:
+            neighbors = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        else:
+            neighbors = np.tile(np.arange(num_train), (query.shape[0], 1))
+        predictions[start:start + chunk_size] = np.mean(output[neighbors], axis=1)
+    return predictions
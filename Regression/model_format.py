@@ -0,0 +1,132 @@
+import json
+import struct
+import numpy as np
+#Compact binary file format for learned weights
+#Covers the weights from regression_gradient_descent,
+#lasso_cyclical_coordinate_descent and logistic_regression_with_L2
+#(Classification Week 2), which otherwise only live in notebook variables.
+#
+#Layout:
+#  8 bytes   magic 'UWMODEL\0'
+#  4 bytes   format version, little endian uint32
+#  4 bytes   header length, little endian uint32
+#  header    utf-8 json: model_type, feature_names, norms, metadata and
+#            the dtype, shape and offset of every array
+#  arrays    raw little endian data, each starting on an ALIGNMENT boundary
+#
+#load_model memory-maps the arrays read only, so every process serving
+#the same file shares one physical copy through the page cache.
+
+MODEL_MAGIC = b'UWMODEL\0'
+MODEL_VERSION = 1
+ALIGNMENT = 64
+_PREAMBLE = struct.Struct('<8sII')
+
+MODEL_TYPES = ('linear_regression', 'lasso', 'logistic_regression')
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+#arrays maps a name to a numpy array, most models only have 'weights'
+#norms are the feature norms from normalize_features when the weights were
+#learned on normalized features, None otherwise
+def save_model(path, model_type, arrays, feature_names=None, norms=None, metadata=None):
+    if model_type not in MODEL_TYPES:
+        raise ValueError('unknown model type %r, expected one of %s'
+                         % (model_type, ', '.join(MODEL_TYPES)))
+    contiguous = {}
+    for name in arrays:
+        array = np.ascontiguousarray(arrays[name])
+        contiguous[name] = array.astype(array.dtype.newbyteorder('<'), copy=False)
+    if feature_names is not None and 'weights' in contiguous:
+        if len(feature_names) != len(contiguous['weights']):
+            raise ValueError('%d feature names for %d weights'
+                             % (len(feature_names), len(contiguous['weights'])))
+
+    #offsets are relative to the start of the data section, which itself
+    #starts aligned, so the header can be built before it is measured
+    layout = {}
+    offset = 0
+    for name in sorted(contiguous):
+        array = contiguous[name]
+        layout[name] = {'dtype': array.dtype.str,
+                        'shape': list(array.shape),
+                        'offset': offset}
+        offset = _align(offset + array.nbytes)
+    header = {'model_type': model_type,
+              'feature_names': list(feature_names) if feature_names is not None else None,
+              'norms': [float(n) for n in norms] if norms is not None else None,
+              'metadata': metadata or {},
+              'arrays': layout}
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _align(_PREAMBLE.size + len(header_bytes))
+
+    with open(path, 'wb') as f:
+        f.write(_PREAMBLE.pack(MODEL_MAGIC, MODEL_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b'\0' * (data_start - f.tell()))
+        for name in sorted(contiguous):
+            position = data_start + layout[name]['offset']
+            f.write(b'\0' * (position - f.tell()))
+            f.write(contiguous[name].tobytes())
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        magic, version, header_length = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != MODEL_MAGIC:
+            raise ValueError('%s is not a model file' % path)
+        if version != MODEL_VERSION:
+            raise ValueError('unsupported model format version %d' % version)
+        header = json.loads(f.read(header_length).decode('utf-8'))
+    header['data_start'] = _align(_PREAMBLE.size + header_length)
+    return header
+
+
+#Returns the header dict with an 'arrays' dict of read only memmaps
+def load_model(path):
+    header = read_header(path)
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        shape = tuple(spec['shape'])
+        if int(np.prod(shape)) == 0:
+            arrays[name] = np.zeros(shape, dtype=spec['dtype'])
+            continue
+        arrays[name] = np.memmap(path, dtype=spec['dtype'], mode='r',
+                                 offset=header['data_start'] + spec['offset'],
+                                 shape=shape)
+    header['arrays'] = arrays
+    if header['norms'] is not None:
+        header['norms'] = np.array(header['norms'])
+    return header
+
+
+#Weights to apply to raw (unnormalized) feature rows, the same as
+#weights / norms in the lasso notebook. Zero norms count as 1 like
+#Normalizer.safe_norms, so all-zero columns keep a finite weight
+def raw_weights(model):
+    weights = model['arrays']['weights']
+    if model['norms'] is None:
+        return weights
+    return weights / np.where(model['norms'] > 0, model['norms'], 1.0)
+
+
+#predict_output for the regression models, predict_probability for logistic
+def predict(model, feature_matrix):
+    scores = np.dot(feature_matrix, raw_weights(model))
+    if model['model_type'] == 'logistic_regression':
+        #1 / (1 + exp(-scores)) without overflow for large negative scores
+        return np.exp(-np.logaddexp(0., -scores))
+    return scores
+
+
+#(feature name, coefficient) rows, the layout of the coefficient table in
+#the logistic regression notebooks
+def coefficient_table(model):
+    weights = model['arrays']['weights']
+    names = model['feature_names']
+    if names is None:
+        names = ['feature_%d' % i for i in range(len(weights))]
+    return list(zip(names, [float(w) for w in weights]))
@@ -0,0 +1,72 @@
+import numpy as np
+#Column normalization that can be fitted chunk by chunk (Week 5 and Week 6)
+#normalize_features needs the whole matrix in memory and divides by zero
+#when a column is all zeros. Normalizer only keeps the running sum of
+#squares of each column, so the training data can be streamed through
+#partial_fit, and the same norms are then applied to the training,
+#validation, test and query rows.
+
+class Normalizer(object):
+
+    def __init__(self, norms=None):
+        self.sq_sums = None
+        self.num_rows = 0
+        self.norms = None
+        if norms is not None:
+            self.norms = np.array(norms, dtype=np.float64)
+            self.sq_sums = self.norms ** 2
+
+    #Accumulate the squared column sums of one chunk of rows
+    def partial_fit(self, chunk):
+        chunk = np.atleast_2d(np.asarray(chunk, dtype=np.float64))
+        chunk_sq_sums = np.einsum('ij,ij->j', chunk, chunk)
+        if self.sq_sums is None:
+            self.sq_sums = chunk_sq_sums
+        elif len(chunk_sq_sums) != len(self.sq_sums):
+            raise ValueError('chunk has %d columns, expected %d'
+                             % (len(chunk_sq_sums), len(self.sq_sums)))
+        else:
+            self.sq_sums += chunk_sq_sums
+        self.num_rows += chunk.shape[0]
+        self.norms = np.sqrt(self.sq_sums)
+        return self
+
+    def fit(self, feature_matrix):
+        self.sq_sums = None
+        self.num_rows = 0
+        return self.partial_fit(feature_matrix)
+
+    #Norms used for division, all-zero columns are left unscaled
+    def safe_norms(self):
+        if self.norms is None:
+            raise ValueError('Normalizer has not been fitted')
+        return np.where(self.norms > 0, self.norms, 1.0)
+
+    #Divide every column by its norm
+    #out may be a preallocated buffer, or the input itself to normalize in place
+    def transform(self, feature_matrix, out=None):
+        norms = self.safe_norms()
+        feature_matrix = np.asarray(feature_matrix)
+        if out is None:
+            return feature_matrix / norms
+        np.divide(feature_matrix, norms, out=out)
+        return out
+
+    def fit_transform(self, feature_matrix, out=None):
+        return self.fit(feature_matrix).transform(feature_matrix, out=out)
+
+    #Weights learned on normalized features -> weights on the original features
+    #same as weights_normalized = weights / norms in the lasso notebook
+    def inverse_transform(self, weights, out=None):
+        norms = self.safe_norms()
+        if out is None:
+            return np.asarray(weights) / norms
+        np.divide(weights, norms, out=out)
+        return out
+
+
+#Drop in replacement for normalize_features, returns (normalized, norms)
+#Zero columns stay zero instead of turning into nan
+def normalize_features(feature_matrix):
+    normalizer = Normalizer().fit(feature_matrix)
+    return(normalizer.transform(feature_matrix), normalizer.norms)
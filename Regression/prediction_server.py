@@ -0,0 +1,242 @@
+import json
+import threading
+import time
+from collections import deque
+import numpy as np
+try:
+    import queue
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn, UnixStreamServer
+except ImportError: #python 2
+    import Queue as queue
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn, UnixStreamServer
+#Local prediction server for the house price models
+#Requests are queued and grouped into micro-batches, either when
+#max_batch_size rows are waiting or max_delay seconds after the first one
+#arrived, so one vectorized predict_output / knn_predict call serves many
+#requests instead of one call per house. Rows are checked before they are
+#queued, and if a batch still fails its requests are retried one by one, so
+#a bad request only ever fails itself.
+
+#Latency percentiles over the most recent requests plus a histogram of
+#batch sizes
+class LatencyStats(object):
+
+    def __init__(self, max_batch_size, window=10000):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = np.zeros(max_batch_size + 1, dtype=np.int64)
+        self.num_requests = 0
+
+    def record_batch(self, latencies):
+        with self.lock:
+            self.latencies.extend(latencies)
+            self.batch_sizes[len(latencies)] += 1
+            self.num_requests += len(latencies)
+
+    def summary(self):
+        with self.lock:
+            latencies = np.array(self.latencies)
+            batch_sizes = self.batch_sizes.copy()
+            num_requests = self.num_requests
+        if len(latencies) > 0:
+            p50, p99 = np.percentile(latencies, [50, 99])
+        else:
+            p50, p99 = 0., 0.
+        histogram = {}
+        for size in np.nonzero(batch_sizes)[0]:
+            histogram[int(size)] = int(batch_sizes[size])
+        return {'requests': num_requests,
+                'latency_p50_ms': 1000 * p50,
+                'latency_p99_ms': 1000 * p99,
+                'batch_size_histogram': histogram}
+
+
+class _Request(object):
+
+    def __init__(self, row):
+        self.row = row
+        self.start = time.time()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+#predict_fn takes a 2d array of rows and returns one prediction per row
+#num_features defaults to predict_fn.num_features when it has one (see
+#linear_predictor and knn_predictor), rows of another width are rejected
+class MicroBatcher(object):
+
+    def __init__(self, predict_fn, max_batch_size=64, max_delay=0.002, num_features=None):
+        self.predict_fn = predict_fn
+        if num_features is None:
+            num_features = getattr(predict_fn, 'num_features', None)
+        self.num_features = num_features
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.requests = queue.Queue()
+        self.stats = LatencyStats(max_batch_size)
+        self.worker = threading.Thread(target=self._run)
+        self.worker.daemon = True
+        self.worker.start()
+
+    def check_row(self, row):
+        row = np.asarray(row, dtype=np.float64)
+        if row.ndim != 1:
+            raise ValueError('features must be a flat list of numbers')
+        if self.num_features is not None and len(row) != self.num_features:
+            raise ValueError('expected %d features, got %d' % (self.num_features, len(row)))
+        return row
+
+    #Blocks until the batch holding this row has been predicted
+    def predict(self, row):
+        request = _Request(self.check_row(row))
+        self.requests.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _next_batch(self):
+        batch = [self.requests.get()]
+        deadline = batch[0].start + self.max_delay
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            try:
+                if remaining > 0:
+                    batch.append(self.requests.get(timeout=remaining))
+                else:
+                    batch.append(self.requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _predict_batch(self, batch):
+        predictions = self.predict_fn(np.vstack([r.row for r in batch]))
+        if len(predictions) != len(batch):
+            raise ValueError('%d predictions for %d rows' % (len(predictions), len(batch)))
+        return [float(prediction) for prediction in predictions]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                for request, prediction in zip(batch, self._predict_batch(batch)):
+                    request.result = prediction
+            except Exception:
+                #find the request(s) at fault instead of failing them all
+                for request in batch:
+                    try:
+                        request.result = self._predict_batch([request])[0]
+                    except Exception as e:
+                        request.error = e
+            now = time.time()
+            self.stats.record_batch([now - r.start for r in batch])
+            for request in batch:
+                request.done.set()
+
+
+#predict_output from the regression notebooks, rows include the constant
+def linear_predictor(weights):
+    weights = np.asarray(weights, dtype=np.float64)
+    def predict(feature_matrix):
+        return np.dot(feature_matrix, weights)
+    predict.num_features = len(weights)
+    return predict
+
+
+#avg_nn on a model saved with knn_model.save_knn_model
+def knn_predictor(model, k):
+    from knn_model import knn_predict
+    def predict(feature_matrix):
+        return knn_predict(model, k, feature_matrix)
+    predict.num_features = model['features'].shape[1]
+    return predict
+
+
+#POST /predict with {"features": [...]} returns {"prediction": ...}
+#GET /stats returns the latency percentiles and batch size histogram
+class PredictionHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._reply(404, {'error': 'unknown path %s' % self.path})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length).decode('utf-8'))
+            prediction = self.server.batcher.predict(body['features'])
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {'error': str(e)})
+            return
+        except Exception as e:
+            self._reply(500, {'error': '%s: %s' % (type(e).__name__, e)})
+            return
+        self._reply(200, {'prediction': prediction})
+
+    def do_GET(self):
+        if self.path != '/stats':
+            self._reply(404, {'error': 'unknown path %s' % self.path})
+            return
+        self._reply(200, self.server.batcher.stats.summary())
+
+    def _reply(self, code, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    #per request logging costs more than the prediction itself
+    def log_message(self, format, *args):
+        pass
+
+
+#a deep listen backlog so bursts queue up instead of being reset
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    #BaseHTTPRequestHandler expects a (host, port) client address
+    def get_request(self):
+        request, _ = UnixStreamServer.get_request(self)
+        return request, ('local', 0)
+
+
+#Pass socket_path to listen on a Unix socket instead of host:port
+def make_server(batcher, host='127.0.0.1', port=8000, socket_path=None):
+    if socket_path is not None:
+        server = ThreadingUnixHTTPServer(socket_path, PredictionHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), PredictionHandler)
+    server.batcher = batcher
+    return server
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Serve house price predictions')
+    parser.add_argument('--weights', help='.npy file of linear regression weights')
+    parser.add_argument('--knn-model', help='directory written by save_knn_model')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--socket', help='Unix socket path')
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-delay-ms', type=float, default=2.)
+    args = parser.parse_args()
+    if args.knn_model:
+        from knn_model import load_knn_model
+        predict_fn = knn_predictor(load_knn_model(args.knn_model), args.k)
+    elif args.weights:
+        predict_fn = linear_predictor(np.load(args.weights))
+    else:
+        parser.error('one of --weights or --knn-model is required')
+    batcher = MicroBatcher(predict_fn, args.max_batch_size, args.max_delay_ms / 1000.)
+    make_server(batcher, port=args.port, socket_path=args.socket).serve_forever()
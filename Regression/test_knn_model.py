@@ -0,0 +1,30 @@
+import numpy as np
+from knn_model import build_knn_index, knn_predict, load_knn_model, save_knn_model
+from normalizer import normalize_features
+#knn_predict on a saved model must match a brute force nearest neighbor
+#average, also when a training column is all zeros
+
+
+def brute_force_predict(features_train, output_train, query_set, k):
+    predictions = []
+    for query in query_set:
+        distances = np.sqrt(np.sum((features_train - query) ** 2, axis=1))
+        predictions.append(np.mean(output_train[np.argsort(distances)[:k]]))
+    return np.array(predictions)
+
+
+def test_zero_training_column(tmpdir):
+    rng = np.random.RandomState(0)
+    feature_matrix = rng.rand(200, 4) * [1., 1000., 0., 5.]
+    query_set = rng.rand(20, 4) * [1., 1000., 0., 5.]
+    output = rng.rand(200) * 1e5
+    features_train, norms = normalize_features(feature_matrix)
+    path = str(tmpdir.join('model'))
+    save_knn_model(path, features_train, norms, output, ['a', 'b', 'zero', 'c'],
+                   index=build_knn_index(features_train))
+    predictions = knn_predict(load_knn_model(path), 4, query_set, chunk_size=7)
+    safe_norms = np.where(norms > 0, norms, 1.0)
+    expected = brute_force_predict(features_train, output, query_set / safe_norms, 4)
+    assert not np.isnan(predictions).any()
+    assert len(np.unique(predictions)) > 1
+    np.testing.assert_allclose(predictions, expected)